@@ -18,6 +18,7 @@ from telegram.ext import ContextTypes
 
 from config import config
 from db import init_db, close_engine, migrate_legacy_notification_times
+from services import weather_service
 from common.middleware import setup_middleware
 
 # Import all module initializers
@@ -58,7 +59,10 @@ async def create_bot() -> Application:
         update_interval=60
     )
     
-    # Configure application with timeout settings
+    # Configure application with timeout settings.
+    # Все вызовы Bot API из хендлеров идут через один общий пул HTTPXRequest (keep-alive),
+    # long-poll getUpdates — через отдельный запрос, чтобы не занимать соединения хендлеров.
+    # Короткий connect_timeout: мёртвое соединение не держит хендлер по 30 секунд
     application = (
         ApplicationBuilder()
         .token(config.BOT_TOKEN)
@@ -68,7 +72,10 @@ async def create_bot() -> Application:
         .pool_timeout(30.0)
         .read_timeout(30)
         .write_timeout(30)
-        .connect_timeout(30)
+        .connect_timeout(5)
+        .get_updates_connection_pool_size(1)
+        .get_updates_read_timeout(30)
+        .get_updates_connect_timeout(5)
         .build()
     )
     
@@ -123,22 +130,39 @@ async def run_bot(application: Application) -> None:
     """
     Run the bot application.
     """
-    logger.info("Starting bot polling...")
+    allowed_updates = [
+        "message",
+        "callback_query",
+        "chat_member",
+        "my_chat_member"
+    ]
     
     try:
         await application.initialize()
         await application.start()
         
-        # Start polling with error handling - use SYNCHRONOUS function
-        await application.updater.start_polling(
-            allowed_updates=[
-                "message",
-                "callback_query",
-                "chat_member",
-                "my_chat_member"
-            ],
-            error_callback=handle_polling_error
-        )
+        if config.WEBHOOK_URL:
+            # Telegram сам доставляет апдейты: нет long-poll getUpdates и задержки между опросами
+            logger.info("Starting bot webhook...")
+            webhook_path = config.WEBHOOK_URL.split("://", 1)[-1].partition("/")[2]
+            await application.updater.start_webhook(
+                listen=config.WEBHOOK_LISTEN,
+                port=config.WEBHOOK_PORT,
+                url_path=webhook_path,
+                webhook_url=config.WEBHOOK_URL,
+                secret_token=config.WEBHOOK_SECRET or None,
+                allowed_updates=allowed_updates,
+                # Апдейты обрабатываются конкурентно, поэтому Telegram может слать больше
+                # параллельных запросов, чем 40 по умолчанию, не выстраивая их в очередь
+                max_connections=100,
+            )
+        else:
+            logger.info("Starting bot polling...")
+            # Start polling with error handling - use SYNCHRONOUS function
+            await application.updater.start_polling(
+                allowed_updates=allowed_updates,
+                error_callback=handle_polling_error
+            )
         
         logger.info("Bot is running!")
         
@@ -200,6 +224,12 @@ async def shutdown_bot(application: Application, loop: asyncio.AbstractEventLoop
     except Exception as e:
         logger.error(f"Error shutting down application: {e}")
     
+    # Close the shared weather HTTP session
+    try:
+        await weather_service.close()
+    except Exception as e:
+        logger.error(f"Error closing weather session: {e}")
+    
     # Close database connections
     try:
         await close_engine()
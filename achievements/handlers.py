@@ -9,7 +9,7 @@ from datetime import datetime
 from telegram import Update, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from config import Locale, AchievementType
+from config import Locale, AchievementType, ACHIEVEMENTS
 from db import (
     get_user_achievements, get_user, has_achievement,
     get_achievements_count
@@ -32,7 +32,7 @@ from achievements.utils import (
     get_rarity_stats,
     get_recent_achievements
 )
-from achievements.constants import STATS_MESSAGES, RARITY_DISPLAY
+from achievements.constants import STATS_MESSAGES, RARITY_DISPLAY, ACHIEVEMENT_CATEGORIES
 from common.decorators import require_registration
 from common.helpers import get_user_locale, safe_send_message, get_progress_bar
 
@@ -67,8 +67,6 @@ async def cb_achievements(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 def format_achievements_main(data: dict, recent: list, lang: str) -> str:
     """Format main achievements menu text (synchronous)"""
-    from achievements.constants import STATS_MESSAGES, RARITY_DISPLAY
-    
     messages = STATS_MESSAGES["ru"] if lang == "ru" else STATS_MESSAGES["en"]
     
     text = [
@@ -123,7 +121,6 @@ async def cb_achievement_category(update: Update, context: ContextTypes.DEFAULT_
     earned_ids = [a.achievement_type.value for a in earned]
     
     # Get category info
-    from achievements.constants import ACHIEVEMENT_CATEGORIES
     category = ACHIEVEMENT_CATEGORIES.get(category_id, {})
     
     text = f"**{category['icon']} {category[f'name_{lang}']}**\n\n"
@@ -195,7 +192,6 @@ async def cb_achievement_rarity(update: Update, context: ContextTypes.DEFAULT_TY
     earned_ids = [a.achievement_type.value for a in earned]
     
     # Get rarity info
-    from achievements.constants import RARITY_DISPLAY
     rarity_info = RARITY_DISPLAY.get(rarity, {})
     
     text = f"{rarity_info['emoji']} **{rarity_info[f'name_{lang}']}**"
@@ -298,7 +294,6 @@ async def cb_achievement_share(update: Update, context: ContextTypes.DEFAULT_TYP
         return
     
     # Get achievement info
-    from config import ACHIEVEMENTS, Locale
     info = ACHIEVEMENTS.get(ach_type, {})
     name = Locale.get(f"ach_{ach_type.value}", lang)
     
@@ -372,11 +367,10 @@ async def cb_achievement_track(update: Update, context: ContextTypes.DEFAULT_TYP
         return
     
     # Set tracking in user data
-    if "tracking_achievements" not in context.user_data:
-        context.user_data["tracking_achievements"] = []
+    tracking = context.user_data.setdefault("tracking_achievements", [])
     
-    if ach_id not in context.user_data["tracking_achievements"]:
-        context.user_data["tracking_achievements"].append(ach_id)
+    if ach_id not in tracking:
+        tracking.append(ach_id)
         text = "✅ " + ("Достижение добавлено в отслеживание", "Achievement added to tracking")[lang == "en"]
     else:
         text = "ℹ️ " + ("Уже отслеживается", "Already tracking")[lang == "en"]
@@ -2,6 +2,8 @@
 Keyboard layouts for achievements module
 """
 
+from functools import lru_cache
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from typing import List, Optional
 
@@ -9,6 +11,7 @@ from config import Locale, AchievementType
 from achievements.constants import ACHIEVEMENT_CATEGORIES, RARITY_DISPLAY
 
 
+@lru_cache(maxsize=4)
 def get_achievements_main_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Main achievements menu keyboard"""
     keyboard = []
@@ -162,6 +165,7 @@ def get_achievement_share_keyboard(ach_type: AchievementType, lang: str = "ru")
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_achievement_progress_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for achievement progress tracking"""
     keyboard = [
@@ -8,6 +8,7 @@ from collections import defaultdict
 
 from config import AchievementType, ACHIEVEMENTS, RARITY_COLORS
 from db import get_user, get_user_achievements, get_today_total
+from services import get_progress_bar
 from achievements.constants import PROGRESS_THRESHOLDS, RARITY_DISPLAY, ACHIEVEMENT_CATEGORIES, UNLOCK_MESSAGES
 
 
@@ -267,20 +268,6 @@ def format_achievement_unlock(
         )
 
 
-def get_progress_bar(current: int, target: int, width: int = 10) -> str:
-    """Generate progress bar for achievements"""
-    if target <= 0:
-        return "░" * width
-    
-    percent = min(current / target, 1.0)
-    filled = int(percent * width)
-    
-    if percent >= 1.0:
-        return "█" * width
-    else:
-        return "█" * filled + "░" * (width - filled)
-
-
 def get_rarity_stats(earned_by_rarity: Dict[str, List]) -> Dict[str, Any]:
     """
     Get statistics by rarity
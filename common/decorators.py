@@ -37,9 +37,11 @@ def require_registration(func: Callable) -> Callable:
                 return await start_registration(update, context)
             
             # Add user to context for easy access
-            context.user_data["user"] = user
-            context.user_data["user_id"] = user_id
-            context.user_data["lang"] = user.language or "ru"
+            # (context.user_data — свойство PTB, берём его один раз на каждый апдейт)
+            user_data = context.user_data
+            user_data["user"] = user
+            user_data["user_id"] = user_id
+            user_data["lang"] = user.language or "ru"
             
             return await func(update, context, *args, **kwargs)
             
@@ -226,12 +228,14 @@ def user_context(func: Callable) -> Callable:
     """Decorator to ensure user context is loaded"""
     @functools.wraps(func)
     async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
-        if update.effective_user:
-            context.user_data["user_id"] = update.effective_user.id
-            context.user_data["username"] = update.effective_user.username
-            context.user_data["first_name"] = update.effective_user.first_name
-            context.user_data["last_name"] = update.effective_user.last_name
-            context.user_data["lang"] = get_user_locale(update)
+        tg_user = update.effective_user
+        if tg_user:
+            user_data = context.user_data
+            user_data["user_id"] = tg_user.id
+            user_data["username"] = tg_user.username
+            user_data["first_name"] = tg_user.first_name
+            user_data["last_name"] = tg_user.last_name
+            user_data["lang"] = get_user_locale(update)
         
         return await func(update, context, *args, **kwargs)
     return wrapper
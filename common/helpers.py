@@ -8,14 +8,16 @@ import hashlib
 import random
 import string
 import logging
+from collections import OrderedDict
 from typing import Optional, List, Dict, Any, Tuple, Union, Callable
 from datetime import datetime, date, timedelta
-from zoneinfo import ZoneInfo, available_timezones
+from zoneinfo import available_timezones
 
-from telegram import Update, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardMarkup, Message
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
+from config import get_zone
 from common.constants import (
     MAX_MESSAGE_LENGTH, PROGRESS_SYMBOLS, EMOJI_MAP,
     TIME_FORMATS, LOADING_ANIMATIONS
@@ -102,6 +104,12 @@ async def safe_send_message(
             return False
 
 
+# (исходный текст, parse_mode) -> (текст, entities), какими их отрисовал Telegram.
+# Нужен, чтобы сравнить новый вариант с тем, что уже показано в сообщении
+_RENDERED_TEXT: "OrderedDict[Tuple[str, Optional[str]], Tuple[str, tuple]]" = OrderedDict()
+_RENDERED_TEXT_MAX = 2048
+
+
 async def safe_edit_message(
     query,
     text: str,
@@ -109,23 +117,42 @@ async def safe_edit_message(
     parse_mode: Optional[str] = ParseMode.MARKDOWN
 ) -> bool:
     """Safely edit message with error handling"""
+    key = (text, parse_mode)
+    rendered = (text, ()) if parse_mode is None else _RENDERED_TEXT.get(key)
+    message = query.message
+    if (
+        rendered is not None
+        and isinstance(message, Message)
+        and (message.text, message.entities) == rendered
+        and message.reply_markup == reply_markup
+    ):
+        # Сообщение уже такое: Telegram ответил бы "message is not modified", запрос не нужен
+        return True
+    
     try:
-        await query.edit_message_text(
+        edited = await query.edit_message_text(
             text=text,
             parse_mode=parse_mode,
             reply_markup=reply_markup
         )
-        return True
     except Exception as e:
         logger.error(f"Failed to edit message: {e}")
         return False
+    
+    if parse_mode is not None and isinstance(edited, Message) and edited.text is not None:
+        _RENDERED_TEXT[key] = (edited.text, edited.entities)
+        _RENDERED_TEXT.move_to_end(key)
+        if len(_RENDERED_TEXT) > _RENDERED_TEXT_MAX:
+            _RENDERED_TEXT.popitem(last=False)
+    return True
 
 
 def get_user_locale(update: Update) -> str:
     """Get user's language preference from Telegram"""
     if update and update.effective_user:
         lang_code = update.effective_user.language_code
-        if lang_code and lang_code.lower().startswith("ru"):
+        # Telegram отдаёт language_code в нижнем регистре (IETF), lower() не нужен
+        if lang_code and lang_code.startswith("ru"):
             return "ru"
     return "en"
 
@@ -142,16 +169,38 @@ def format_number(num: Union[int, float], lang: str = "ru", decimals: int = 0) -
     return f"{num:,}"
 
 
+# Все допустимые "ЧЧ:ММ" и "Ч:ММ" (~2000 строк) заранее: разбор времени — один поиск в словаре
+_TIME_LOOKUP: Dict[str, Tuple[int, int]] = {}
+for _hour in range(24):
+    for _minute in range(60):
+        _TIME_LOOKUP[f"{_hour:02d}:{_minute:02d}"] = (_hour, _minute)
+        if _hour < 10:
+            _TIME_LOOKUP[f"{_hour}:{_minute:02d}"] = (_hour, _minute)
+del _hour, _minute
+
+
 def parse_time(time_str: str) -> Optional[Tuple[int, int]]:
-    """Parse time string (HH:MM) to (hour, minute)"""
-    match = re.match(r'^([0-1]?[0-9]|2[0-3]):([0-5][0-9])$', time_str)
-    if match:
-        return int(match.group(1)), int(match.group(2))
-    return None
+    """Parse time string (HH:MM or H:MM) to (hour, minute)"""
+    return _TIME_LOOKUP.get(time_str)
 
 
 def parse_date(date_str: str) -> Optional[date]:
     """Parse date string in various formats"""
+    # Частые случаи (ГГГГ-ММ-ДД, ДД.ММ.ГГГГ и аналоги) разбираем по позициям,
+    # без strptime с его regex и локалью на каждую попытку формата
+    if len(date_str) == 10 and date_str.isascii():
+        if date_str[4] == "-" and date_str[7] == "-":
+            year, month, day = date_str[:4], date_str[5:7], date_str[8:]
+        elif date_str[2] in "./-" and date_str[5] == date_str[2]:
+            day, month, year = date_str[:2], date_str[3:5], date_str[6:]
+        else:
+            year = month = day = ""
+        if year.isdigit() and month.isdigit() and day.isdigit():
+            try:
+                return date(int(year), int(month), int(day))
+            except ValueError:
+                return None
+    
     formats = [
         "%Y-%m-%d",
         "%d.%m.%Y",
@@ -171,7 +220,7 @@ def parse_date(date_str: str) -> Optional[date]:
 def get_local_time(user_timezone: str = "UTC") -> datetime:
     """Get current time in user's timezone"""
     try:
-        tz = ZoneInfo(user_timezone)
+        tz = get_zone(user_timezone)
         return datetime.now(tz)
     except:
         return datetime.utcnow()
@@ -290,19 +339,19 @@ def json_loads(data: str) -> Any:
     return json.loads(data)
 
 
+# available_timezones() обходит tzdata на диске при каждом вызове — читаем один раз
+_VALID_TIMEZONES = frozenset(available_timezones())
+
+
 def validate_timezone(tz_name: str) -> bool:
     """Validate timezone string"""
-    try:
-        ZoneInfo(tz_name)
-        return tz_name in available_timezones()
-    except:
-        return False
+    return tz_name in _VALID_TIMEZONES
 
 
 def get_timezone_offset(tz_name: str) -> Optional[float]:
     """Get timezone offset in hours"""
     try:
-        tz = ZoneInfo(tz_name)
+        tz = get_zone(tz_name)
         now = datetime.now(tz)
         offset = now.utcoffset()
         if offset:
@@ -324,22 +373,27 @@ def parse_telegram_command(text: str) -> Tuple[str, str]:
     return command, args
 
 
+_MENTION_RE = re.compile(r'@(\w+)')
+_NUMBER_RE = re.compile(r'[-+]?\d*\.?\d+')
+_NON_DIGIT_RE = re.compile(r'\D')
+
+
 def extract_mention(text: str) -> Optional[str]:
     """Extract username mention from text"""
-    match = re.search(r'@(\w+)', text)
+    match = _MENTION_RE.search(text)
     return match.group(1) if match else None
 
 
 def extract_number(text: str) -> Optional[float]:
     """Extract number from text"""
-    match = re.search(r'[-+]?\d*\.?\d+', text)
+    match = _NUMBER_RE.search(text)
     return float(match.group()) if match else None
 
 
 def format_phone(phone: str) -> str:
     """Format phone number"""
     # Remove all non-digits
-    digits = re.sub(r'\D', '', phone)
+    digits = _NON_DIGIT_RE.sub('', phone)
     
     if len(digits) == 11:
         return f"+{digits[0]} ({digits[1:4]}) {digits[4:7]}-{digits[7:9]}-{digits[9:11]}"
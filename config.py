@@ -4,10 +4,13 @@ Telegram Bot "Вода за день" - Apple-level Design & Experience
 """
 
 import os
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from enum import Enum
 from typing import Dict, List
 from pathlib import Path
+from zoneinfo import ZoneInfo
 
 # ============================================================================
 # LOAD .ENV FILE
@@ -40,6 +43,12 @@ class Config:
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
     
+    # Webhook вместо polling (пустой WEBHOOK_URL — обычный polling)
+    WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "")
+    WEBHOOK_LISTEN: str = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", "8443"))
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+    
     DEFAULT_NOTIFICATION_START: int = 8
     DEFAULT_NOTIFICATION_END: int = 22
     NOTIFICATION_INTERVAL_HOURS: int = 2
@@ -153,6 +162,10 @@ class AchievementType(str, Enum):
     TRAVELER = "traveler"
     VARIETY_KING = "variety_king"
 
+# Ключи локализации и callback_data для кнопок, собранные один раз при импорте
+_DRINK_KEYS: Dict[DrinkType, str] = {d: sys.intern(f"drink_{d.value}") for d in DrinkType}
+_CB_MODE: Dict[ActivityMode, str] = {m: sys.intern(f"mode_{m.value}") for m in ActivityMode}
+
 # ============================================================================
 # DRINK COEFFICIENTS
 # ============================================================================
@@ -680,256 +693,285 @@ class Locale:
         "export_json": "📋 JSON",
         "export_success": "📤 Data exported",
     }
-    
-    @classmethod
-    def get(cls, key: str, lang: str = "ru") -> str:
-        strings = cls.RU if lang.lower() == "ru" else cls.EN
-        return strings.get(key, key)
+
+
+def _dedupe_locale_strings() -> None:
+    """Одинаковые строки RU/EN ссылаются на один объект; короткие ASCII-значения интернируются"""
+    pool: Dict[str, str] = {}
+    for strings in (Locale.RU, Locale.EN):
+        for key, value in strings.items():
+            if len(value) <= 20 and value.isascii():
+                value = sys.intern(value)
+            strings[key] = pool.setdefault(value, value)
+
+
+_dedupe_locale_strings()
+
+_LOCALES: Dict[str, Dict[str, str]] = {"ru": Locale.RU, "en": Locale.EN}
+
+
+def t(key: str, lang: str = "ru", _L=_LOCALES, _EN=Locale.EN) -> str:
+    """Быстрый перевод без classmethod-обёртки (словари связаны через аргументы по умолчанию)"""
+    return _L.get(lang, _EN).get(key, key)
+
+
+# Обратная совместимость: Locale.get(key, lang) остаётся рабочим
+Locale.get = staticmethod(t)
 
 
 def get_user_locale(lang_code: str) -> str:
-    if lang_code and lang_code.lower().startswith("ru"):
-        return "ru"
-    return "en"
+    return "ru" if lang_code and lang_code.startswith("ru") else "en"
 
 
 # ============================================================================
 # KEYBOARDS
 # ============================================================================
+# Разметка InlineKeyboardMarkup неизменяемая, поэтому готовые клавиатуры
+# кешируются по языку и отдаются всем пользователям один и тот же объект.
 
+@lru_cache(maxsize=4)
 def get_main_keyboard(lang: str = "ru"):
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     keyboard = [
-        [InlineKeyboardButton(Locale.get("main_add_water", lang), callback_data="add_water")],
+        [InlineKeyboardButton(t("main_add_water", lang), callback_data="add_water")],
         [
-            InlineKeyboardButton(Locale.get("main_stats", lang), callback_data="stats"),
-            InlineKeyboardButton(Locale.get("main_achievements", lang), callback_data="achievements"),
+            InlineKeyboardButton(t("main_stats", lang), callback_data="stats"),
+            InlineKeyboardButton(t("main_achievements", lang), callback_data="achievements"),
         ],
         [
-            InlineKeyboardButton(Locale.get("main_settings", lang), callback_data="settings"),
-            InlineKeyboardButton(Locale.get("main_about", lang), callback_data="about"),
+            InlineKeyboardButton(t("main_settings", lang), callback_data="settings"),
+            InlineKeyboardButton(t("main_about", lang), callback_data="about"),
         ],
     ]
     return InlineKeyboardMarkup(keyboard)
 
 
+# Подписи и callback_data кнопок объёма для обоих языков
+_WATER_LABELS: Dict[str, tuple] = {
+    "ru": tuple(f"💧 {preset} мл" for preset in WATER_PRESETS),
+    "en": tuple(f"💧 {preset} ml" for preset in WATER_PRESETS),
+}
+_WATER_CB: tuple = tuple(f"water_{preset}" for preset in WATER_PRESETS)
+
+
 def get_water_keyboard(lang: str = "ru"):
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-    keyboard = [
-        [
-            InlineKeyboardButton(f"💧 {preset} мл" if lang == "ru" else f"💧 {preset} ml", callback_data=f"water_{preset}")
-            for preset in WATER_PRESETS[:2]
-        ],
-        [
-            InlineKeyboardButton(f"💧 {preset} мл" if lang == "ru" else f"💧 {preset} ml", callback_data=f"water_{preset}")
-            for preset in WATER_PRESETS[2:]
-        ],
-        [
-            InlineKeyboardButton(Locale.get("add_custom", lang), callback_data="water_custom"),
-            InlineKeyboardButton(Locale.get("btn_cancel", lang), callback_data="cancel"),
-        ],
-    ]
+    buttons = tuple(
+        InlineKeyboardButton(label, callback_data=cb)
+        for label, cb in zip(_WATER_LABELS["ru" if lang == "ru" else "en"], _WATER_CB)
+    )
+    keyboard = (
+        buttons[:2],
+        buttons[2:],
+        (
+            InlineKeyboardButton(t("add_custom", lang), callback_data="water_custom"),
+            InlineKeyboardButton(t("btn_cancel", lang), callback_data="cancel"),
+        ),
+    )
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_drink_category_keyboard(lang: str = "ru"):
     """Клавиатура выбора категории напитка"""
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     keyboard = [
-        [InlineKeyboardButton(Locale.get("cat_water", lang), callback_data="cat_water")],
-        [InlineKeyboardButton(Locale.get("cat_tea", lang), callback_data="cat_tea")],
-        [InlineKeyboardButton(Locale.get("cat_coffee", lang), callback_data="cat_coffee")],
-        [InlineKeyboardButton(Locale.get("cat_other", lang), callback_data="cat_other")],
-        [InlineKeyboardButton(Locale.get("btn_cancel", lang), callback_data="cancel")],
+        [InlineKeyboardButton(t("cat_water", lang), callback_data="cat_water")],
+        [InlineKeyboardButton(t("cat_tea", lang), callback_data="cat_tea")],
+        [InlineKeyboardButton(t("cat_coffee", lang), callback_data="cat_coffee")],
+        [InlineKeyboardButton(t("cat_other", lang), callback_data="cat_other")],
+        [InlineKeyboardButton(t("btn_cancel", lang), callback_data="cancel")],
     ]
     return InlineKeyboardMarkup(keyboard)
 
 
+# Напитки по категориям, заранее разбитые на ряды по 2
+_DRINKS_BY_CATEGORY: Dict[str, tuple] = {
+    "water": (DrinkType.WATER, DrinkType.SPARKLING_WATER, DrinkType.MINERAL_WATER),
+    "tea": (DrinkType.TEA_BLACK, DrinkType.TEA_GREEN, DrinkType.TEA_HERBAL, DrinkType.TEA_WITH_MILK, DrinkType.MATCHA),
+    "coffee": (DrinkType.ESPRESSO, DrinkType.AMERICANO, DrinkType.CAPPUCCINO, DrinkType.LATTE, DrinkType.FLAT_WHITE, DrinkType.MOCHA, DrinkType.ICED_COFFEE, DrinkType.COLD_BREW),
+    "other": (DrinkType.JUICE, DrinkType.SMOOTHIE, DrinkType.MILK, DrinkType.SODA, DrinkType.ENERGY_DRINK),
+}
+_DRINK_ROWS: Dict[str, tuple] = {
+    cat: tuple(drinks[i:i + 2] for i in range(0, len(drinks), 2))
+    for cat, drinks in _DRINKS_BY_CATEGORY.items()
+}
+
+
+@lru_cache(maxsize=16)
 def get_drink_type_keyboard(lang: str = "ru", category: str = "water"):
-    """Клавиатура выбора конкретного напитка"""
+    """Клавиатура выбора конкретного напитка (кешируется по языку и категории)"""
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     
-    drinks_map = {
-        "water": [DrinkType.WATER, DrinkType.SPARKLING_WATER, DrinkType.MINERAL_WATER],
-        "tea": [DrinkType.TEA_BLACK, DrinkType.TEA_GREEN, DrinkType.TEA_HERBAL, DrinkType.TEA_WITH_MILK, DrinkType.MATCHA],
-        "coffee": [DrinkType.ESPRESSO, DrinkType.AMERICANO, DrinkType.CAPPUCCINO, DrinkType.LATTE, DrinkType.FLAT_WHITE, DrinkType.MOCHA, DrinkType.ICED_COFFEE, DrinkType.COLD_BREW],
-        "other": [DrinkType.JUICE, DrinkType.SMOOTHIE, DrinkType.MILK, DrinkType.SODA, DrinkType.ENERGY_DRINK],
-    }
-    
-    keyboard = []
-    row = []
-    for i, drink in enumerate(drinks_map.get(category, [])):
-        name = Locale.get(f"drink_{drink.value}", lang)
-        row.append(InlineKeyboardButton(name, callback_data=f"drink_{drink.value}"))
-        if len(row) == 2:
-            keyboard.append(row)
-            row = []
-    if row:
-        keyboard.append(row)
-    
-    keyboard.append([InlineKeyboardButton(Locale.get("btn_back", lang), callback_data="drink_cat")])
+    keyboard = tuple(
+        tuple(InlineKeyboardButton(t(_DRINK_KEYS[drink], lang), callback_data=_DRINK_KEYS[drink]) for drink in row)
+        for row in _DRINK_ROWS.get(category, ())
+    ) + ((InlineKeyboardButton(t("btn_back", lang), callback_data="drink_cat"),),)
     
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_settings_keyboard(lang: str = "ru"):
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     keyboard = [
-        [InlineKeyboardButton(Locale.get("settings_profile", lang), callback_data="settings_profile")],
-        [InlineKeyboardButton(Locale.get("settings_notifications", lang), callback_data="settings_notifications")],
-        [InlineKeyboardButton(Locale.get("settings_timezone", lang), callback_data="settings_timezone")],
-        [InlineKeyboardButton(Locale.get("settings_mode", lang), callback_data="settings_mode")],
-        [InlineKeyboardButton(Locale.get("settings_language", lang), callback_data="settings_language")],
-        [InlineKeyboardButton(Locale.get("settings_export", lang), callback_data="settings_export")],
-        [InlineKeyboardButton(Locale.get("btn_back", lang), callback_data="main_menu")],
+        [InlineKeyboardButton(t("settings_profile", lang), callback_data="settings_profile")],
+        [InlineKeyboardButton(t("settings_notifications", lang), callback_data="settings_notifications")],
+        [InlineKeyboardButton(t("settings_timezone", lang), callback_data="settings_timezone")],
+        [InlineKeyboardButton(t("settings_mode", lang), callback_data="settings_mode")],
+        [InlineKeyboardButton(t("settings_language", lang), callback_data="settings_language")],
+        [InlineKeyboardButton(t("settings_export", lang), callback_data="settings_export")],
+        [InlineKeyboardButton(t("btn_back", lang), callback_data="main_menu")],
     ]
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_profile_keyboard(lang: str = "ru"):
     """Клавиатура редактирования профиля"""
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     keyboard = [
         [
-            InlineKeyboardButton(Locale.get("profile_weight", lang), callback_data="edit_weight"),
-            InlineKeyboardButton(Locale.get("profile_height", lang), callback_data="edit_height"),
+            InlineKeyboardButton(t("profile_weight", lang), callback_data="edit_weight"),
+            InlineKeyboardButton(t("profile_height", lang), callback_data="edit_height"),
         ],
         [
-            InlineKeyboardButton(Locale.get("profile_gender", lang), callback_data="edit_gender"),
-            InlineKeyboardButton(Locale.get("profile_activity", lang), callback_data="edit_activity"),
+            InlineKeyboardButton(t("profile_gender", lang), callback_data="edit_gender"),
+            InlineKeyboardButton(t("profile_activity", lang), callback_data="edit_activity"),
         ],
-        [InlineKeyboardButton(Locale.get("profile_city", lang), callback_data="edit_city")],
-        [InlineKeyboardButton(Locale.get("btn_back", lang), callback_data="settings")],
+        [InlineKeyboardButton(t("profile_city", lang), callback_data="edit_city")],
+        [InlineKeyboardButton(t("btn_back", lang), callback_data="settings")],
     ]
     return InlineKeyboardMarkup(keyboard)
 
 
+_MODE_KEYS = (
+    (ActivityMode.NORMAL, "mode_normal"),
+    (ActivityMode.WORKOUT, "mode_workout"),
+    (ActivityMode.FOCUS, "mode_focus"),
+    (ActivityMode.VACATION, "mode_vacation"),
+)
+# (обычная подпись, подпись с отметкой) для каждого режима и языка
+_MODE_LABELS: Dict[str, Dict[ActivityMode, tuple]] = {
+    lang: {mode: (t(key, lang), f"✓ {t(key, lang)}") for mode, key in _MODE_KEYS}
+    for lang in ("ru", "en")
+}
+
+
+@lru_cache(maxsize=16)
 def get_mode_keyboard(lang: str = "ru", current_mode: str = "normal"):
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     
-    def mode_btn(mode: ActivityMode, label_key: str):
-        label = Locale.get(label_key, lang)
-        if current_mode == mode.value:
-            label = f"✓ {label}"
-        return InlineKeyboardButton(label, callback_data=f"mode_{mode.value}")
-    
-    keyboard = [
-        [mode_btn(ActivityMode.NORMAL, "mode_normal")],
-        [mode_btn(ActivityMode.WORKOUT, "mode_workout")],
-        [mode_btn(ActivityMode.FOCUS, "mode_focus")],
-        [mode_btn(ActivityMode.VACATION, "mode_vacation")],
-        [InlineKeyboardButton(Locale.get("btn_back", lang), callback_data="settings")],
-    ]
+    labels = _MODE_LABELS["ru" if lang == "ru" else "en"]
+    keyboard = tuple(
+        (InlineKeyboardButton(labels[mode][current_mode == mode.value], callback_data=_CB_MODE[mode]),)
+        for mode, _ in _MODE_KEYS
+    ) + ((InlineKeyboardButton(t("btn_back", lang), callback_data="settings"),),)
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_stats_keyboard(lang: str = "ru"):
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     keyboard = [
         [
-            InlineKeyboardButton(Locale.get("stats_day", lang), callback_data="stats_day"),
-            InlineKeyboardButton(Locale.get("stats_week", lang), callback_data="stats_week"),
+            InlineKeyboardButton(t("stats_day", lang), callback_data="stats_day"),
+            InlineKeyboardButton(t("stats_week", lang), callback_data="stats_week"),
         ],
         [
-            InlineKeyboardButton(Locale.get("stats_month", lang), callback_data="stats_month"),
-            InlineKeyboardButton(Locale.get("stats_year", lang), callback_data="stats_year"),
+            InlineKeyboardButton(t("stats_month", lang), callback_data="stats_month"),
+            InlineKeyboardButton(t("stats_year", lang), callback_data="stats_year"),
         ],
-        [InlineKeyboardButton(Locale.get("btn_back", lang), callback_data="main_menu")],
+        [InlineKeyboardButton(t("btn_back", lang), callback_data="main_menu")],
     ]
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_language_keyboard(lang: str = "ru"):
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     keyboard = [
         [InlineKeyboardButton("🇷🇺 Русский" + (" ✓" if lang == "ru" else ""), callback_data="lang_ru")],
         [InlineKeyboardButton("🇬🇧 English" + (" ✓" if lang == "en" else ""), callback_data="lang_en")],
-        [InlineKeyboardButton(Locale.get("btn_back", lang), callback_data="settings")],
+        [InlineKeyboardButton(t("btn_back", lang), callback_data="settings")],
     ]
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_export_keyboard(lang: str = "ru"):
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     keyboard = [
         [
-            InlineKeyboardButton(Locale.get("export_csv", lang), callback_data="export_csv"),
-            InlineKeyboardButton(Locale.get("export_json", lang), callback_data="export_json"),
-        ],
-        [InlineKeyboardButton(Locale.get("btn_back", lang), callback_data="settings")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
-
-
-def get_gender_keyboard(lang: str = "ru"):
-    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-    keyboard = [
-        [
-            InlineKeyboardButton(Locale.get("btn_male", lang), callback_data=f"gender_{Gender.MALE.value}"),
-            InlineKeyboardButton(Locale.get("btn_female", lang), callback_data=f"gender_{Gender.FEMALE.value}"),
+            InlineKeyboardButton(t("export_csv", lang), callback_data="export_csv"),
+            InlineKeyboardButton(t("export_json", lang), callback_data="export_json"),
         ],
+        [InlineKeyboardButton(t("btn_back", lang), callback_data="settings")],
     ]
     return InlineKeyboardMarkup(keyboard)
 
 
-def get_activity_keyboard(lang: str = "ru"):
-    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-    keyboard = [
-        [InlineKeyboardButton(Locale.get("activity_low", lang), callback_data=f"activity_{ActivityLevel.LOW.value}")],
-        [InlineKeyboardButton(Locale.get("activity_medium", lang), callback_data=f"activity_{ActivityLevel.MEDIUM.value}")],
-        [InlineKeyboardButton(Locale.get("activity_high", lang), callback_data=f"activity_{ActivityLevel.HIGH.value}")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
-
-
+@lru_cache(maxsize=32)
 def get_back_keyboard(lang: str = "ru", callback_data: str = "main_menu"):
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-    keyboard = [[InlineKeyboardButton(Locale.get("btn_back", lang), callback_data=callback_data)]]
+    keyboard = [[InlineKeyboardButton(t("btn_back", lang), callback_data=callback_data)]]
     return InlineKeyboardMarkup(keyboard)
 
 
+# Список популярных часовых поясов
+_TIMEZONES = (
+    ("UTC-12:00", "Etc/GMT+12"),
+    ("UTC-11:00", "Etc/GMT+11"),
+    ("UTC-10:00", "Pacific/Honolulu"),
+    ("UTC-09:00", "America/Anchorage"),
+    ("UTC-08:00", "America/Los_Angeles"),
+    ("UTC-07:00", "America/Denver"),
+    ("UTC-06:00", "America/Chicago"),
+    ("UTC-05:00", "America/New_York"),
+    ("UTC-04:00", "America/Caracas"),
+    ("UTC-03:00", "America/Sao_Paulo"),
+    ("UTC-02:00", "Etc/GMT+2"),
+    ("UTC-01:00", "Atlantic/Azores"),
+    ("UTC+00:00", "UTC"),
+    ("UTC+01:00", "Europe/London"),
+    ("UTC+02:00", "Europe/Berlin"),
+    ("UTC+03:00", "Europe/Moscow"),
+    ("UTC+04:00", "Europe/Samara"),
+    ("UTC+05:00", "Asia/Yekaterinburg"),
+    ("UTC+06:00", "Asia/Almaty"),
+    ("UTC+07:00", "Asia/Bangkok"),
+    ("UTC+08:00", "Asia/Singapore"),
+    ("UTC+09:00", "Asia/Tokyo"),
+    ("UTC+10:00", "Australia/Sydney"),
+    ("UTC+11:00", "Pacific/Noumea"),
+    ("UTC+12:00", "Pacific/Auckland"),
+)
+
+
+@lru_cache(maxsize=None)
+def _timezone_rows():
+    """Ряды кнопок часовых поясов по 3 в ряд (не зависят от языка, строятся один раз)"""
+    from telegram import InlineKeyboardButton
+    return tuple(
+        tuple(InlineKeyboardButton(label, callback_data=f"tz_{tz_name}") for label, tz_name in _TIMEZONES[i:i + 3])
+        for i in range(0, len(_TIMEZONES), 3)
+    )
+
+
+@lru_cache(maxsize=4)
 def get_timezone_keyboard(lang: str = "ru"):
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
     
-    # Список популярных часовых поясов
-    timezones = [
-        ("UTC-12:00", "Etc/GMT+12"),
-        ("UTC-11:00", "Etc/GMT+11"),
-        ("UTC-10:00", "Pacific/Honolulu"),
-        ("UTC-09:00", "America/Anchorage"),
-        ("UTC-08:00", "America/Los_Angeles"),
-        ("UTC-07:00", "America/Denver"),
-        ("UTC-06:00", "America/Chicago"),
-        ("UTC-05:00", "America/New_York"),
-        ("UTC-04:00", "America/Caracas"),
-        ("UTC-03:00", "America/Sao_Paulo"),
-        ("UTC-02:00", "Etc/GMT+2"),
-        ("UTC-01:00", "Atlantic/Azores"),
-        ("UTC+00:00", "UTC"),
-        ("UTC+01:00", "Europe/London"),
-        ("UTC+02:00", "Europe/Berlin"),
-        ("UTC+03:00", "Europe/Moscow"),
-        ("UTC+04:00", "Europe/Samara"),
-        ("UTC+05:00", "Asia/Yekaterinburg"),
-        ("UTC+06:00", "Asia/Almaty"),
-        ("UTC+07:00", "Asia/Bangkok"),
-        ("UTC+08:00", "Asia/Singapore"),
-        ("UTC+09:00", "Asia/Tokyo"),
-        ("UTC+10:00", "Australia/Sydney"),
-        ("UTC+11:00", "Pacific/Noumea"),
-        ("UTC+12:00", "Pacific/Auckland"),
-    ]
-
-    keyboard = []
-    row = []
-    for label, tz_name in timezones:
-        row.append(InlineKeyboardButton(label, callback_data=f"tz_{tz_name}"))
-        if len(row) == 3:
-            keyboard.append(row)
-            row = []
-    if row:
-        keyboard.append(row)
-    
-    keyboard.append([InlineKeyboardButton(Locale.get("btn_back", lang), callback_data="settings")])
+    back_row = (InlineKeyboardButton(t("btn_back", lang), callback_data="settings"),)
+    keyboard = (*_timezone_rows(), back_row)
     
-    return InlineKeyboardMarkup(keyboard)
\ No newline at end of file
+    return InlineKeyboardMarkup(keyboard)
+
+
+@lru_cache(maxsize=None)
+def get_zone(tz_name: str) -> ZoneInfo:
+    """ZoneInfo by IANA name, resolved once per process"""
+    # Собственный кэш ZoneInfo держит сильные ссылки лишь на несколько последних зон;
+    # джобы обходят всех пользователей подряд, поэтому каждая зона разбирается здесь один раз.
+    # Неизвестное имя по-прежнему бросает ZoneInfoNotFoundError и в кэш не попадает
+    return ZoneInfo(tz_name)
@@ -2,17 +2,35 @@
 Async database module for WaterBot.
 """
 
+from sqlalchemy import text
+
 from db.engine import init_engine, close_engine, get_engine
 from db.session import session_manager, get_db, get_transaction, get_session
 from db.models import Base  # Импортируем Base из models
+
+
+# Индексы прежней схемы, которые перекрыты новыми (тот же ведущий столбец, больше колонок)
+_SUPERSEDED_INDEXES = (
+    "ix_water_logs_user_date",
+    "ix_notifications_pending",
+    "ix_notifications_user",
+)
+
+
+def _create_missing_indexes(sync_conn) -> None:
+    """create_all skips existing tables, so indexes added to the models later are created here."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
 from db.crud import (
     # User
-    get_user, create_user, get_or_create_user, update_user,
+    get_user, get_user_timezone, create_user, get_or_create_user, update_user,
+    toggle_notifications_enabled,
     complete_registration, update_registration_step, get_registration_data,
     
     # Water logs
-    add_water_log, get_today_logs, get_today_total, get_date_total,
-    get_logs_for_period, get_drink_breakdown, delete_last_log,
+    add_water_log, add_water_log_with_total, get_today_logs, get_today_total, get_date_total,
+    get_logs_for_period, get_intake_points, get_daily_totals, get_drink_breakdown, delete_last_log,
     
     # Achievements
     has_achievement, add_achievement, get_user_achievements,
@@ -25,11 +43,11 @@ from db.crud import (
     get_user_stats, get_week_stats, get_month_heatmap,
     
     # Insights
-    add_insight, get_unread_insights, mark_insights_read,
+    add_insight, add_insights, get_unread_insights, mark_insights_read,
     
     # Notifications
     delete_future_notifications, schedule_notification,
-    get_pending_notifications, mark_notification_sent,
+    get_pending_notifications, mark_notification_sent, mark_notifications_sent,
     reschedule_smart_notifications,
     
     # Migration
@@ -50,7 +68,19 @@ async def init_db():
     
     # СОЗДАЕМ ТАБЛИЦЫ!
     async with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # pysqlite не открывает транзакцию перед DDL, и каждый CREATE коммитится
+            # отдельно. Явный BEGIN — вся схема одной транзакцией; COMMIT сделает engine.begin()
+            await conn.exec_driver_sql("BEGIN")
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
+        for name in _SUPERSEDED_INDEXES:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        if engine.dialect.name == "sqlite":
+            # Статистика для планировщика запросов, чтобы он выбирал составные индексы.
+            # analysis_limit ограничивает ANALYZE выборкой строк — старт остаётся быстрым
+            await conn.execute(text("PRAGMA analysis_limit=1000"))
+            await conn.execute(text("ANALYZE"))
     
     return engine
 
@@ -73,18 +103,23 @@ __all__ = [
     
     # All CRUD functions
     "get_user",
+    "get_user_timezone",
     "create_user",
     "get_or_create_user",
     "update_user",
+    "toggle_notifications_enabled",
     "complete_registration",
     "update_registration_step",
     "get_registration_data",
     
     "add_water_log",
+    "add_water_log_with_total",
     "get_today_logs",
     "get_today_total",
     "get_date_total",
     "get_logs_for_period",
+    "get_intake_points",
+    "get_daily_totals",
     "get_drink_breakdown",
     "delete_last_log",
     
@@ -101,6 +136,7 @@ __all__ = [
     "get_month_heatmap",
     
     "add_insight",
+    "add_insights",
     "get_unread_insights",
     "mark_insights_read",
     
@@ -108,6 +144,7 @@ __all__ = [
     "schedule_notification",
     "get_pending_notifications",
     "mark_notification_sent",
+    "mark_notifications_sent",
     "reschedule_smart_notifications",
     
     "migrate_legacy_notification_times",
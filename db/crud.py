@@ -7,12 +7,21 @@ import math
 import logging
 import io
 import csv
+import time
+import functools
 from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any, Tuple
 from zoneinfo import ZoneInfo
 
-from sqlalchemy import func, and_, select, delete, update
+from sqlalchemy import func, and_, select, delete, update, insert, case, true, literal
 from sqlalchemy.sql import exists
+from sqlalchemy.orm import raiseload
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+try:
+    import orjson  # optional, noticeably faster on small payloads
+except ImportError:
+    orjson = None
 
 from db.session import session_manager
 from db.models import (
@@ -21,27 +30,104 @@ from db.models import (
 )
 from config import (
     Gender, ActivityLevel, ActivityMode, DrinkType, AchievementType,
-    DRINK_COEFFICIENTS, WATER_PRESETS, ACHIEVEMENTS, config
+    DRINK_COEFFICIENTS, WATER_PRESETS, ACHIEVEMENTS, config, get_zone
 )
 
 # НЕ ИМПОРТИРУЕМ services здесь - это вызывает циклическую зависимость
 
 logger = logging.getLogger(__name__)
 
+_UTC = ZoneInfo("UTC")
+
+
+def _json_dumps(data: Any) -> str:
+    """Serialize a value for a Text column (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data)
+
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 
 # ============================================================================
 # USER CRUD
 # ============================================================================
 
+# Короткоживущий кеш get_user: один хэндлер часто читает пользователя несколько раз.
+# Любая запись в users через функции этого модуля сбрасывает запись кеша.
+_USER_CACHE_TTL = 30  # seconds
+_USER_CACHE_MAX = 10_000
+_user_cache: Dict[int, Tuple[float, User]] = {}
+# Часовой пояс меняется редко: держим его без TTL до первой записи в users
+_timezone_cache: Dict[int, str] = {}
+# Поколение строки пользователя: растёт после каждой записи в users.
+# Чтение, начавшееся до коммита записи, видит другое поколение и не кладёт старую строку в кеш
+_user_gen: Dict[int, int] = {}
+
+
+def _bump_user_gen(user_id: int) -> int:
+    """Mark the user row as changed and drop its cached copies."""
+    gen = _user_gen.get(user_id, 0) + 1
+    _user_gen[user_id] = gen
+    _user_cache.pop(user_id, None)
+    _timezone_cache.pop(user_id, None)
+    return gen
+
+
+def _invalidates_user(func):
+    """Drop the cached user row once the wrapped write has committed."""
+    @functools.wraps(func)
+    async def wrapper(user_id: int, *args, **kwargs):
+        try:
+            return await func(user_id, *args, **kwargs)
+        finally:
+            _bump_user_gen(user_id)
+    return wrapper
+
+
 async def get_user(user_id: int) -> Optional[User]:
     """Get user by Telegram ID."""
+    now = time.monotonic()
+    cached = _user_cache.get(user_id)
+    if cached and now - cached[0] < _USER_CACHE_TTL:
+        return cached[1]
+    
+    gen = _user_gen.get(user_id, 0)
     async with session_manager.session() as session:
         result = await session.execute(
             select(User).where(User.id == user_id)
         )
-        return result.scalar_one_or_none()
+        user = result.scalar_one_or_none()
+    
+    if user is not None and _user_gen.get(user_id, 0) == gen:
+        if len(_user_cache) >= _USER_CACHE_MAX:
+            _user_cache.clear()
+        _user_cache[user_id] = (now, user)
+    return user
+
+
+async def get_user_timezone(user_id: int) -> str:
+    """Get user's timezone name, reading only the timezone column."""
+    tz_name = _timezone_cache.get(user_id)
+    if tz_name is not None:
+        return tz_name
+    
+    gen = _user_gen.get(user_id, 0)
+    async with session_manager.session() as session:
+        tz_name = await session.scalar(
+            select(User.timezone).where(User.id == user_id)
+        )
+    tz_name = tz_name or "UTC"
+    if _user_gen.get(user_id, 0) != gen:
+        return tz_name
+    if len(_timezone_cache) >= _USER_CACHE_MAX:
+        _timezone_cache.clear()
+    _timezone_cache[user_id] = tz_name
+    return tz_name
 
 
+@_invalidates_user
 async def create_user(
     user_id: int,
     username: str = None,
@@ -64,6 +150,7 @@ async def create_user(
         return user
 
 
+@_invalidates_user
 async def get_or_create_user(
     user_id: int,
     username: str = None,
@@ -72,44 +159,88 @@ async def get_or_create_user(
     language: str = "ru"
 ) -> User:
     """Get existing user or create new one."""
-    user = await get_user(user_id)
-    if user:
-        # Update basic info if changed
-        async with session_manager.session() as session:
-            user = await session.get(User, user_id)
+    async with session_manager.session() as session:
+        result = await session.execute(
+            select(User).where(User.id == user_id).options(raiseload("*"))
+        )
+        user = result.scalar_one_or_none()
+        if user:
+            # Update basic info if changed
             if username:
                 user.username = username
             if first_name:
                 user.first_name = first_name
             if last_name:
                 user.last_name = last_name
-            await session.flush()
-            return user
-    return await create_user(user_id, username, first_name, last_name, language)
+        else:
+            user = User(
+                id=user_id,
+                username=username,
+                first_name=first_name,
+                last_name=last_name,
+                language=language,
+                registration_step="weight"
+            )
+            session.add(user)
+        await session.flush()
+        return user
+
+
+# Колонки users, которые можно менять через update_user: связи и методы модели отсекаются
+_USER_COLUMNS = frozenset(User.__table__.columns.keys())
 
 
 async def update_user(user_id: int, **kwargs) -> Optional[User]:
-    """Update user fields."""
+    """Update user fields (write-through: the committed row replaces the cached one)."""
+    gen = _bump_user_gen(user_id)
+    
+    values = {key: value for key, value in kwargs.items() if key in _USER_COLUMNS}
+    
     async with session_manager.session() as session:
-        user = await session.get(User, user_id)
+        if not values:
+            user = await session.get(User, user_id)
+        else:
+            # Один UPDATE ... RETURNING вместо SELECT + UPDATE; скомпилированный
+            # запрос кешируется SQLAlchemy по набору колонок и переиспользуется
+            result = await session.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(**values)
+                .returning(User)
+            )
+            user = result.scalar_one_or_none()
         if not user:
+            _bump_user_gen(user_id)
             return None
-        
-        for key, value in kwargs.items():
-            if hasattr(user, key):
-                setattr(user, key, value)
-        
-        await session.flush()
-        return user
+    
+    # Сессия закрыта и закоммичена, expire_on_commit=False сохраняет загруженные поля.
+    # Если за время записи прошла другая запись, её строка новее — в кеш ничего не кладём
+    if _bump_user_gen(user_id) == gen + 1:
+        _user_cache[user_id] = (time.monotonic(), user)
+    return user
+
+
+@_invalidates_user
+async def toggle_notifications_enabled(user_id: int) -> Optional[bool]:
+    """Flip notifications_enabled in one statement; returns the new value or None if no user."""
+    async with session_manager.session() as session:
+        result = await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(notifications_enabled=~func.coalesce(User.notifications_enabled, True))
+            .returning(User.notifications_enabled)
+        )
+        return result.scalar_one_or_none()
 
 
-async def complete_registration(user_id: int) -> Optional[User]:
-    """Mark user registration as complete."""
+async def complete_registration(user_id: int, **fields) -> Optional[User]:
+    """Mark user registration as complete (extra profile fields go into the same UPDATE)."""
     return await update_user(
         user_id,
         registration_complete=True,
         registration_step=None,
-        registration_data=None
+        registration_data=None,
+        **fields
     )
 
 
@@ -118,7 +249,7 @@ async def update_registration_step(user_id: int, step: str, data: Dict = None) -
     return await update_user(
         user_id,
         registration_step=step,
-        registration_data=json.dumps(data) if data else None
+        registration_data=_json_dumps(data) if data else None
     )
 
 
@@ -126,7 +257,7 @@ async def get_registration_data(user_id: int) -> Dict:
     """Get current registration temporary data."""
     user = await get_user(user_id)
     if user and user.registration_data:
-        return json.loads(user.registration_data)
+        return _json_loads(user.registration_data)
     return {}
 
 
@@ -141,9 +272,23 @@ async def add_water_log(
     timezone: str = "UTC"
 ) -> WaterLog:
     """Add a water intake record."""
+    log, _ = await add_water_log_with_total(user_id, volume_ml, drink_type, timezone)
+    return log
+
+
+@_invalidates_user
+async def add_water_log_with_total(
+    user_id: int,
+    volume_ml: int,
+    drink_type: DrinkType = DrinkType.WATER,
+    timezone: str = "UTC"
+) -> Tuple[WaterLog, int]:
+    """Add a water intake record and return it with today's new total."""
     coefficient = DRINK_COEFFICIENTS.get(drink_type, 1.0)
     effective_ml = int(volume_ml * coefficient)
     
+    today = date.today()
+    
     async with session_manager.session() as session:
         log = WaterLog(
             user_id=user_id,
@@ -152,19 +297,32 @@ async def add_water_log(
             drink_type=drink_type,
             coefficient=coefficient,
             timezone=timezone,
-            logged_date=date.today()
+            logged_date=today
         )
         session.add(log)
-        
-        # Update user stats
-        user = await session.get(User, user_id)
-        if user:
-            user.total_water_ml = (user.total_water_ml or 0) + effective_ml
-            user.last_water_at = datetime.utcnow()
-            user.last_active_date = date.today()
-        
         await session.flush()
-        return log
+        
+        # Счётчики пользователя — одним UPDATE без предварительного SELECT строки users
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                total_water_ml=func.coalesce(User.total_water_ml, 0) + effective_ml,
+                last_water_at=datetime.utcnow(),
+                last_active_date=today
+            )
+        )
+        # Сумма за день в той же транзакции: хендлеру не нужен отдельный get_today_total
+        today_total = await session.scalar(
+            select(func.sum(WaterLog.effective_ml))
+            .where(
+                and_(
+                    WaterLog.user_id == user_id,
+                    WaterLog.logged_date == today
+                )
+            )
+        )
+        return log, today_total or 0
 
 
 async def get_today_logs(user_id: int) -> List[WaterLog]:
@@ -233,6 +391,53 @@ async def get_logs_for_period(
         return result.scalars().all()
 
 
+async def get_intake_points(
+    user_id: int,
+    start_date: date,
+    end_date: date
+) -> List[Tuple[date, Optional[datetime], int]]:
+    """
+    Get (logged_date, logged_at, effective_ml) tuples for a date range.
+    Plain rows, no ORM entities — for aggregations that only need these columns.
+    """
+    async with session_manager.session() as session:
+        result = await session.execute(
+            select(WaterLog.logged_date, WaterLog.logged_at, WaterLog.effective_ml)
+            .where(
+                and_(
+                    WaterLog.user_id == user_id,
+                    WaterLog.logged_date >= start_date,
+                    WaterLog.logged_date <= end_date
+                )
+            )
+        )
+        return result.all()
+
+
+async def get_daily_totals(
+    user_id: int,
+    start_date: date,
+    end_date: date
+) -> Dict[date, int]:
+    """Get total effective water per day for a date range (summed in SQL)."""
+    async with session_manager.session() as session:
+        result = await session.execute(
+            select(
+                WaterLog.logged_date,
+                func.sum(WaterLog.effective_ml)
+            )
+            .where(
+                and_(
+                    WaterLog.user_id == user_id,
+                    WaterLog.logged_date >= start_date,
+                    WaterLog.logged_date <= end_date
+                )
+            )
+            .group_by(WaterLog.logged_date)
+        )
+        return {log_date: total or 0 for log_date, total in result.all()}
+
+
 async def get_drink_breakdown(user_id: int, target_date: date = None) -> Dict[str, int]:
     """Get breakdown by drink type for a date."""
     target = target_date or date.today()
@@ -253,26 +458,32 @@ async def get_drink_breakdown(user_id: int, target_date: date = None) -> Dict[st
         return {str(row[0]): row[1] for row in result.all() if row[0]}
 
 
+@_invalidates_user
 async def delete_last_log(user_id: int) -> bool:
     """Delete the most recent water log."""
+    last_log_id = (
+        select(WaterLog.id)
+        .where(WaterLog.user_id == user_id)
+        .order_by(WaterLog.logged_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
     async with session_manager.session() as session:
-        result = await session.execute(
-            select(WaterLog)
-            .where(WaterLog.user_id == user_id)
-            .order_by(WaterLog.logged_at.desc())
-            .limit(1)
+        effective_ml = await session.scalar(
+            delete(WaterLog)
+            .where(WaterLog.id == last_log_id)
+            .returning(WaterLog.effective_ml)
         )
-        log = result.scalar_one_or_none()
+        if effective_ml is None:
+            return False
         
-        if log:
-            # Update user total
-            user = await session.get(User, user_id)
-            if user:
-                user.total_water_ml = max(0, (user.total_water_ml or 0) - log.effective_ml)
-            
-            await session.delete(log)
-            return True
-        return False
+        # Update user total
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(total_water_ml=func.max(0, func.coalesce(User.total_water_ml, 0) - effective_ml))
+        )
+        return True
 
 
 async def delete_all_logs(user_id: int) -> None:
@@ -285,6 +496,7 @@ async def delete_all_logs(user_id: int) -> None:
     logger.info(f"Deleted all logs for user {user_id}")
 
 
+@_invalidates_user
 async def delete_user(user_id: int) -> None:
     """Delete user and all associated data."""
     async with session_manager.session() as session:
@@ -313,32 +525,37 @@ async def has_achievement(user_id: int, achievement_type: AchievementType) -> bo
         return result.scalar()
 
 
+@_invalidates_user
 async def add_achievement(
     user_id: int,
     achievement_type: AchievementType,
     context: Dict = None
 ) -> Optional[UserAchievement]:
-    """Award an achievement to user."""
-    if await has_achievement(user_id, achievement_type):
-        return None
-    
+    """Award an achievement to user (no-op if already earned)."""
     async with session_manager.session() as session:
-        achievement = UserAchievement(
-            user_id=user_id,
-            achievement_type=achievement_type,
-            context=json.dumps(context) if context else None
+        # Уникальный индекс (user_id, achievement_type) отсекает повтор без отдельного SELECT
+        achievement = await session.scalar(
+            sqlite_insert(UserAchievement)
+            .values(
+                user_id=user_id,
+                achievement_type=achievement_type,
+                earned_at=datetime.utcnow(),
+                context=_json_dumps(context) if context else None
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "achievement_type"])
+            .returning(UserAchievement)
         )
-        session.add(achievement)
+        if achievement is None:
+            return None
         
-        # Add XP to user
+        # XP и уровень (100 XP на уровень) пересчитываются одним UPDATE в той же транзакции
         xp = ACHIEVEMENTS.get(achievement_type, {}).get("xp", 0)
-        user = await session.get(User, user_id)
-        if user:
-            user.xp = (user.xp or 0) + xp
-            # Level up check (100 XP per level)
-            user.level = 1 + (user.xp // 100)
-        
-        await session.flush()
+        new_xp = func.coalesce(User.xp, 0) + xp
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(xp=new_xp, level=1 + new_xp // 100)
+        )
         return achievement
 
 
@@ -371,40 +588,50 @@ async def get_achievements_count(user_id: int) -> int:
 async def update_streak(user_id: int, reached_goal: bool) -> int:
     """Update user streak based on daily goal achievement."""
     async with session_manager.session() as session:
-        user = await session.get(User, user_id)
-        if not user:
-            return 0
+        if not reached_goal:
+            streak = await session.scalar(
+                select(User.current_streak).where(User.id == user_id)
+            )
+            return streak or 0
         
         today = date.today()
         yesterday = today - timedelta(days=1)
+        current = func.coalesce(User.current_streak, 0)
         
-        if reached_goal:
-            if user.last_active_date == yesterday or user.last_active_date == today:
-                # Continue streak
-                if user.last_active_date != today:
-                    user.current_streak = (user.current_streak or 0) + 1
-            elif user.last_active_date is None:
-                # First day
-                user.current_streak = 1
-            else:
-                # Streak was broken
-                user.current_streak = 1
-            
-            user.longest_streak = max(user.longest_streak or 0, user.current_streak)
-            user.last_active_date = today
-        
-        await session.flush()
-        return user.current_streak or 0
+        # Сегодня — серия не меняется, вчера — продолжается, иначе начинается заново
+        new_streak = case(
+            (User.last_active_date == today, current),
+            (User.last_active_date == yesterday, current + 1),
+            else_=1
+        )
+        streak = await session.scalar(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                current_streak=new_streak,
+                longest_streak=func.max(func.coalesce(User.longest_streak, 0), new_streak),
+                last_active_date=today
+            )
+            .returning(User.current_streak)
+        )
+    
+    _bump_user_gen(user_id)
+    return streak or 0
 
 
 async def check_streak_lost(user_id: int) -> bool:
     """Check if user lost their streak (didn't log yesterday)."""
-    user = await get_user(user_id)
-    if not user or not user.last_active_date:
-        return False
-    
     yesterday = date.today() - timedelta(days=1)
-    return user.last_active_date < yesterday
+    async with session_manager.session() as session:
+        result = await session.execute(
+            select(exists().where(
+                and_(
+                    User.id == user_id,
+                    User.last_active_date < yesterday
+                )
+            ))
+        )
+        return bool(result.scalar())
 
 
 # ============================================================================
@@ -413,72 +640,127 @@ async def check_streak_lost(user_id: int) -> bool:
 
 async def get_user_stats(user_id: int, daily_goal: int = 2000) -> Dict[str, Any]:
     """Get comprehensive user statistics."""
-    user = await get_user(user_id)
-    if not user:
-        return {}
+    today = date.today()
+    week_start = today - timedelta(days=7)
+    month_start = today - timedelta(days=30)
     
-    today_ml = await get_today_total(user_id)
-    today_percent = round((today_ml / daily_goal) * 100, 1) if daily_goal > 0 else 0
+    # Все суммы за день/неделю/месяц одним проходом по логам за месяц
+    logs = (
+        select(
+            func.coalesce(func.sum(case((WaterLog.logged_date == today, WaterLog.effective_ml), else_=0)), 0).label("today_ml"),
+            func.coalesce(func.sum(case((WaterLog.logged_date >= week_start, WaterLog.effective_ml), else_=0)), 0).label("week_total"),
+            func.count(case((WaterLog.logged_date >= week_start, 1))).label("week_count"),
+            func.coalesce(func.sum(WaterLog.effective_ml), 0).label("month_total"),
+        )
+        .where(
+            and_(
+                WaterLog.user_id == user_id,
+                WaterLog.logged_date >= month_start,
+                WaterLog.logged_date <= today
+            )
+        )
+        .cte("logs")
+    )
+    achievements_count = (
+        select(func.count())
+        .select_from(UserAchievement)
+        .where(UserAchievement.user_id == user_id)
+        .scalar_subquery()
+    )
     
-    # Week stats
-    week_start = date.today() - timedelta(days=7)
-    week_logs = await get_logs_for_period(user_id, week_start, date.today())
-    week_total = sum(log.effective_ml for log in week_logs)
-    week_average = week_total / 7 if week_logs else 0
+    async with session_manager.session() as session:
+        result = await session.execute(
+            select(
+                User.current_streak,
+                User.level,
+                User.xp,
+                logs.c.today_ml,
+                logs.c.week_total,
+                logs.c.week_count,
+                logs.c.month_total,
+                achievements_count.label("achievements_count"),
+            )
+            .join(logs, true())
+            .where(User.id == user_id)
+        )
+        row = result.one_or_none()
     
-    # Month stats
-    month_start = date.today() - timedelta(days=30)
-    month_logs = await get_logs_for_period(user_id, month_start, date.today())
-    month_total = sum(log.effective_ml for log in month_logs)
+    if row is None:
+        return {}
+    
+    today_ml = row.today_ml
+    today_percent = round((today_ml / daily_goal) * 100, 1) if daily_goal > 0 else 0
+    week_total = row.week_total
+    week_average = week_total / 7 if row.week_count else 0
+    xp = row.xp or 0
     
     return {
         "today_ml": today_ml,
         "today_goal": daily_goal,
         "today_percent": min(today_percent, 100),
-        "streak": user.current_streak or 0,
+        "streak": row.current_streak or 0,
         "week_total": week_total,
         "week_average": round(week_average, 0),
-        "month_total": month_total,
-        "total_achievements": await get_achievements_count(user_id),
-        "level": user.level or 1,
-        "xp": user.xp or 0,
-        "next_level_xp": 100 - ((user.xp or 0) % 100)
+        "month_total": row.month_total,
+        "total_achievements": row.achievements_count or 0,
+        "level": row.level or 1,
+        "xp": xp,
+        "next_level_xp": 100 - (xp % 100)
     }
 
 
 async def get_week_stats(user_id: int, daily_goal: int = 2000) -> Dict[str, Any]:
     """Get detailed weekly statistics."""
+    today = date.today()
+    week_start = today - timedelta(days=6)
+    
+    # Один сгруппированный запрос вместо 3 запросов на каждый день
+    async with session_manager.session() as session:
+        rows = await session.execute(
+            select(
+                WaterLog.logged_date,
+                WaterLog.drink_type,
+                func.sum(WaterLog.effective_ml),
+                func.count(WaterLog.id)
+            )
+            .where(
+                and_(
+                    WaterLog.user_id == user_id,
+                    WaterLog.logged_date >= week_start,
+                    WaterLog.logged_date <= today
+                )
+            )
+            .group_by(WaterLog.logged_date, WaterLog.drink_type)
+        )
+        streak = await session.scalar(
+            select(User.current_streak).where(User.id == user_id)
+        )
+    
+    per_day: Dict[date, Dict[str, Any]] = {}
+    for log_date, drink_type, total, count in rows.all():
+        day = per_day.setdefault(log_date, {"total": 0, "count": 0, "breakdown": {}})
+        day["total"] += total or 0
+        day["count"] += count or 0
+        if drink_type:
+            day["breakdown"][str(drink_type)] = total
+    
     days = []
     best_day = None
     best_ml = 0
     
     for i in range(7):
-        target_date = date.today() - timedelta(days=6-i)
-        total = await get_date_total(user_id, target_date)
+        target_date = week_start + timedelta(days=i)
+        day = per_day.get(target_date)
+        total = day["total"] if day else 0
         percent = round((total / daily_goal) * 100, 1) if daily_goal > 0 else 0
-        breakdown = await get_drink_breakdown(user_id, target_date)
-        
-        # Count logs
-        async with session_manager.session() as session:
-            result = await session.execute(
-                select(func.count())
-                .select_from(WaterLog)
-                .where(
-                    and_(
-                        WaterLog.user_id == user_id,
-                        WaterLog.logged_date == target_date
-                    )
-                )
-            )
-            count = result.scalar() or 0
         
         day_data = {
             "date": target_date,
             "total_ml": total,
             "goal_ml": daily_goal,
             "percent": min(percent, 100),
-            "logs_count": count,
-            "drink_breakdown": breakdown
+            "logs_count": day["count"] if day else 0,
+            "drink_breakdown": day["breakdown"] if day else {}
         }
         days.append(day_data)
         
@@ -487,28 +769,29 @@ async def get_week_stats(user_id: int, daily_goal: int = 2000) -> Dict[str, Any]
             best_day = day_data
     
     total_ml = sum(d["total_ml"] for d in days)
-    user = await get_user(user_id)
     
     return {
         "days": days,
         "total_ml": total_ml,
         "average_ml": round(total_ml / 7, 0),
         "best_day": best_day,
-        "streak": user.current_streak if user else 0
+        "streak": streak or 0
     }
 
 
 async def get_month_heatmap(user_id: int, daily_goal: int = 2000) -> Dict[date, int]:
     """Get month data for heatmap visualization."""
-    result = {}
     month_start = date.today() - timedelta(days=30)
+    daily_sum = func.sum(WaterLog.effective_ml)
+    # Процент от нормы с потолком 150 считается прямо в SQL
+    percent = (
+        func.min(150, daily_sum * 100 // int(daily_goal))
+        if daily_goal > 0 else literal(0)
+    )
     
     async with session_manager.session() as session:
         rows = await session.execute(
-            select(
-                WaterLog.logged_date,
-                func.sum(WaterLog.effective_ml)
-            )
+            select(WaterLog.logged_date, percent)
             .where(
                 and_(
                     WaterLog.user_id == user_id,
@@ -517,12 +800,7 @@ async def get_month_heatmap(user_id: int, daily_goal: int = 2000) -> Dict[date,
             )
             .group_by(WaterLog.logged_date)
         )
-        
-        for log_date, total in rows.all():
-            percent = int((total / daily_goal) * 100) if daily_goal > 0 else 0
-            result[log_date] = min(percent, 150)
-    
-    return result
+        return dict(rows.all())
 
 
 # ============================================================================
@@ -542,6 +820,19 @@ async def add_insight(user_id: int, text: str, insight_type: str = "general") ->
         return insight
 
 
+async def add_insights(user_id: int, texts: List[str], insight_type: str = "general") -> None:
+    """Add several insights for user in one transaction."""
+    if not texts:
+        return
+    rows = [
+        {"user_id": user_id, "insight_text": text, "insight_type": insight_type}
+        for text in texts
+    ]
+    async with session_manager.session() as session:
+        # Один executemany INSERT и один COMMIT на всю пачку вместо транзакции на каждый инсайт
+        await session.execute(insert(Insight), rows)
+
+
 async def get_unread_insights(user_id: int) -> List[Insight]:
     """Get unread insights for user."""
     async with session_manager.session() as session:
@@ -606,7 +897,7 @@ async def schedule_notification(
             user_id=user_id,
             notification_type=notification_type,
             scheduled_time=scheduled_utc,
-            context=json.dumps(context) if context else None
+            context=_json_dumps(context) if context else None
         )
         session.add(notif)
         await session.commit()
@@ -626,6 +917,7 @@ async def get_pending_notifications(limit: int = 100) -> List[NotificationSchedu
                     NotificationSchedule.scheduled_time <= now + timedelta(minutes=1)
                 )
             )
+            .order_by(NotificationSchedule.scheduled_time)
             .limit(limit)
         )
         return result.scalars().all()
@@ -642,6 +934,25 @@ async def mark_notification_sent(notification_id: int):
         await session.commit()
 
 
+_MARK_SENT_CHUNK = 500  # держимся ниже лимита SQLite на число параметров
+
+
+async def mark_notifications_sent(notification_ids: List[int]):
+    """Mark several notifications as sent with one UPDATE per chunk of ids."""
+    if not notification_ids:
+        return
+    
+    sent_at = datetime.utcnow()
+    async with session_manager.session() as session:
+        for i in range(0, len(notification_ids), _MARK_SENT_CHUNK):
+            await session.execute(
+                update(NotificationSchedule)
+                .where(NotificationSchedule.id.in_(notification_ids[i:i + _MARK_SENT_CHUNK]))
+                .values(is_sent=True, sent_at=sent_at)
+                .execution_options(synchronize_session=False)
+            )
+
+
 # ============================================================================
 # SMART NOTIFICATION RESCHEDULING (CORE LOGIC)
 # ============================================================================
@@ -661,9 +972,9 @@ async def reschedule_smart_notifications(user_id: int):
     
     # 1. Get local time
     try:
-        tz = ZoneInfo(user.timezone or "UTC")
+        tz = get_zone(user.timezone or "UTC")
     except Exception:
-        tz = ZoneInfo("UTC")
+        tz = _UTC
     local_now = datetime.now(tz)
     local_minutes_now = local_now.hour * 60 + local_now.minute
     
@@ -694,21 +1005,7 @@ async def reschedule_smart_notifications(user_id: int):
     
     interval = remaining_minutes / glasses
     
-    # Удаляем будущие smart reminders, но сохраняем morning/evening
-    async with session_manager.session() as session:
-        await session.execute(
-            delete(NotificationSchedule)
-            .where(
-                and_(
-                    NotificationSchedule.user_id == user_id,
-                    NotificationSchedule.is_sent == False,
-                    NotificationSchedule.notification_type == "smart_reminder",
-                    NotificationSchedule.scheduled_time > datetime.utcnow()
-                )
-            )
-        )
-        await session.commit()
-    
+    rows = []
     for i in range(glasses):
         remind_local_minutes = effective_start + (i + 1) * interval
         if remind_local_minutes >= end_min:
@@ -722,15 +1019,36 @@ async def reschedule_smart_notifications(user_id: int):
         if remind_local_dt <= local_now:
             continue
         
-        remind_utc = remind_local_dt.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
+        remind_utc = remind_local_dt.astimezone(_UTC).replace(tzinfo=None)
         
         context = {
             "glass_number": i + 1,
             "total_glasses": glasses,
             "remaining_ml": max(0, remaining - (i * 250))
         }
-        
-        await schedule_notification(user_id, "smart_reminder", remind_utc, context)
+        rows.append({
+            "user_id": user_id,
+            "notification_type": "smart_reminder",
+            "scheduled_time": remind_utc,
+            "context": _json_dumps(context),
+        })
+    
+    # Удаляем будущие smart reminders (morning/evening сохраняем) и вставляем
+    # новые одной транзакцией — один коммит вместо 1 + N
+    async with session_manager.session() as session:
+        await session.execute(
+            delete(NotificationSchedule)
+            .where(
+                and_(
+                    NotificationSchedule.user_id == user_id,
+                    NotificationSchedule.is_sent == False,
+                    NotificationSchedule.notification_type == "smart_reminder",
+                    NotificationSchedule.scheduled_time > datetime.utcnow()
+                )
+            )
+        )
+        if rows:
+            await session.execute(insert(NotificationSchedule), rows)
 
 
 # ============================================================================
@@ -755,6 +1073,8 @@ async def migrate_legacy_notification_times():
             user.notification_end_minutes = user.notification_end * 60
         if users:
             await session.commit()
+            for user in users:
+                _bump_user_gen(user.id)
             logger.info(f"Migrated {len(users)} users to minute-based notification times.")
 
 
@@ -762,18 +1082,33 @@ async def migrate_legacy_notification_times():
 # FAVORITE VOLUMES
 # ============================================================================
 
+@functools.lru_cache(maxsize=1024)
+def _decode_favorite_volumes(raw: str) -> Tuple[int, ...]:
+    # У разных пользователей обычно одни и те же наборы объёмов: JSON разбирается один раз на строку
+    try:
+        return tuple(_json_loads(raw))
+    except (ValueError, TypeError):
+        # ValueError покрывает и json.JSONDecodeError, и orjson.JSONDecodeError (его подкласс);
+        # TypeError — валидный JSON, но не список (например, "5")
+        return ()
+
+
+def _parse_favorite_volumes(raw: Optional[str]) -> List[int]:
+    """Decode the favorite_volumes column, tolerating empty or broken values."""
+    if not raw:
+        return []
+    return list(_decode_favorite_volumes(raw))
+
+
 async def get_favorite_volumes(user_id: int) -> List[int]:
     """Get user's favorite custom volumes."""
     user = await get_user(user_id)
-    if not user or not user.favorite_volumes:
-        return []
-    
-    try:
-        return json.loads(user.favorite_volumes)
-    except:
+    if not user:
         return []
+    return _parse_favorite_volumes(user.favorite_volumes)
 
 
+@_invalidates_user
 async def add_favorite_volume(user_id: int, volume: int) -> List[int]:
     """Add a volume to favorites."""
     async with session_manager.session() as session:
@@ -781,12 +1116,12 @@ async def add_favorite_volume(user_id: int, volume: int) -> List[int]:
         if not user:
             return []
         
-        favorites = await get_favorite_volumes(user_id)
+        favorites = _parse_favorite_volumes(user.favorite_volumes)
         
         if volume not in favorites and volume not in WATER_PRESETS:
             favorites.append(volume)
             favorites = favorites[-config.MAX_CUSTOM_FAVORITES:]
-            user.favorite_volumes = json.dumps(favorites)
+            user.favorite_volumes = _json_dumps(favorites)
         
         await session.flush()
         return favorites
@@ -796,18 +1131,43 @@ async def add_favorite_volume(user_id: int, volume: int) -> List[int]:
 # EXPORT FUNCTIONS
 # ============================================================================
 
+_EXPORT_DAYS = 365
+
+
+def _export_logs_stmt(user_id: int):
+    """Column-only select of the last year of logs (no ORM objects are built)."""
+    today = date.today()
+    return (
+        select(
+            WaterLog.logged_date,
+            WaterLog.logged_at,
+            WaterLog.volume_ml,
+            WaterLog.effective_ml,
+            WaterLog.drink_type
+        )
+        .where(
+            and_(
+                WaterLog.user_id == user_id,
+                WaterLog.logged_date.between(today - timedelta(days=_EXPORT_DAYS), today)
+            )
+        )
+        .order_by(WaterLog.logged_date)
+    )
+
+
 async def export_to_dict(user_id: int) -> Dict[str, Any]:
     """Export all user data to dictionary (for JSON export)."""
     user = await get_user(user_id)
     if not user:
         return {}
     
-    logs = await get_logs_for_period(
-        user_id,
-        date.today() - timedelta(days=365),
-        date.today()
-    )
-    achievements = await get_user_achievements(user_id)
+    async with session_manager.session() as session:
+        logs = (await session.execute(_export_logs_stmt(user_id))).all()
+        achievements = (await session.execute(
+            select(UserAchievement.achievement_type, UserAchievement.earned_at)
+            .where(UserAchievement.user_id == user_id)
+            .order_by(UserAchievement.earned_at.desc())
+        )).all()
     
     return {
         "user": {
@@ -831,44 +1191,43 @@ async def export_to_dict(user_id: int) -> Dict[str, Any]:
         },
         "water_logs": [
             {
-                "date": log.logged_date.isoformat(),
-                "volume_ml": log.volume_ml,
-                "effective_ml": log.effective_ml,
-                "drink_type": str(log.drink_type),
-                "logged_at": log.logged_at.isoformat() if log.logged_at else None,
+                "date": logged_date.isoformat(),
+                "volume_ml": volume_ml,
+                "effective_ml": effective_ml,
+                "drink_type": str(drink_type),
+                "logged_at": logged_at.isoformat() if logged_at else None,
             }
-            for log in logs
+            for logged_date, logged_at, volume_ml, effective_ml, drink_type in logs
         ],
         "achievements": [
             {
-                "type": str(ach.achievement_type),
-                "earned_at": ach.earned_at.isoformat() if ach.earned_at else None,
+                "type": str(achievement_type),
+                "earned_at": earned_at.isoformat() if earned_at else None,
             }
-            for ach in achievements
+            for achievement_type, earned_at in achievements
         ]
     }
 
 
 async def export_to_csv(user_id: int) -> str:
     """Export water logs to CSV format."""
-    logs = await get_logs_for_period(
-        user_id,
-        date.today() - timedelta(days=365),
-        date.today()
-    )
+    # Строки читаются пачками, без загрузки ORM-объектов
+    stmt = _export_logs_stmt(user_id).execution_options(yield_per=1000)
     
     output = io.StringIO()
     writer = csv.writer(output)
     
     writer.writerow(["date", "time", "volume_ml", "effective_ml", "drink_type"])
     
-    for log in logs:
-        writer.writerow([
-            log.logged_date.isoformat(),
-            log.logged_at.strftime("%H:%M") if log.logged_at else "",
-            log.volume_ml,
-            log.effective_ml,
-            str(log.drink_type)
-        ])
+    async with session_manager.session() as session:
+        result = await session.stream(stmt)
+        async for logged_date, logged_at, volume_ml, effective_ml, drink_type in result:
+            writer.writerow([
+                logged_date.isoformat(),
+                logged_at.strftime("%H:%M") if logged_at else "",
+                volume_ml,
+                effective_ml,
+                str(drink_type)
+            ])
     
-    return output.getvalue()
\ No newline at end of file
+    return output.getvalue()
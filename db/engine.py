@@ -35,19 +35,28 @@ async def init_engine() -> AsyncEngine:
         return _engine
 
     db_url = get_database_url()
+    is_sqlite = db_url.startswith("sqlite")
     
     # Create engine with connection pooling
     _engine = create_async_engine(
         db_url,
         echo=config.DEBUG,
-        pool_size=10,
-        max_overflow=20,
-        pool_pre_ping=True,  # verify connections before using
+        # Для SQLite те же 30 соединений держим постоянными: overflow-соединение закрывается
+        # сразу после отдачи и при следующем открытии снова прогоняет PRAGMA с холодным кэшем
+        pool_size=30 if is_sqlite else 10,
+        max_overflow=0 if is_sqlite else 20,
+        # Пинг перед каждой выдачей соединения — лишний SELECT 1 на каждый апдейт;
+        # локальный файл SQLite не «протухает», как сетевое соединение с сервером БД
+        pool_pre_ping=not is_sqlite,
+        pool_use_lifo=True,  # reuse the most recently returned (warm) connection
     )
     
+    if is_sqlite:
+        event.listen(_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    
     # Test connection and set up WAL for SQLite
     async with _engine.begin() as conn:
-        if db_url.startswith("sqlite"):
+        if is_sqlite:
             # Enable WAL mode
             await conn.execute(text("PRAGMA journal_mode=WAL"))
             # Set automatic checkpoint size (e.g., 1000 pages)
@@ -63,6 +72,19 @@ async def init_engine() -> AsyncEngine:
     return _engine
 
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection SQLite settings, applied once when the pool opens a connection."""
+    cursor = dbapi_connection.cursor()
+    # journal_mode=WAL хранится в самом файле БД и ставится один раз в init_engine
+    # In WAL mode NORMAL is safe against corruption and avoids an fsync per commit
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-64000")  # ~64 MB page cache per connection
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB: reads go through mmap, not read()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
 async def _periodic_checkpoint(engine: AsyncEngine, page_size: int, interval_days: int = 7):
     """
     Periodically run WAL checkpoint to move data into main DB.
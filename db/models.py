@@ -6,7 +6,7 @@ Tables: users, water_logs, achievements, notification_schedule
 from datetime import datetime, date
 from sqlalchemy import (
     Column, Integer, String, Float, Boolean, DateTime,
-    Date, ForeignKey, Enum as SQLEnum, Text, Index
+    Date, ForeignKey, Enum as SQLEnum, Text, Index, text, func
 )
 from sqlalchemy.orm import relationship, declarative_base
 
@@ -50,8 +50,10 @@ class User(Base):
     
     favorite_volumes = Column(String(255), nullable=True)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Python-значение по умолчанию нужно и при server_default: create_all не меняет уже
+    # существующую таблицу users, и в старых базах у колонок нет DEFAULT
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
+    updated_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), onupdate=datetime.utcnow)
     last_water_at = Column(DateTime, nullable=True)
     last_active_date = Column(Date, nullable=True)
     
@@ -64,9 +66,16 @@ class User(Base):
     insights = relationship("Insight", back_populates="user", cascade="all, delete-orphan")
     notifications = relationship("NotificationSchedule", back_populates="user", cascade="all, delete-orphan")
     
+    # Серверные значения по умолчанию возвращаются через RETURNING прямо в INSERT,
+    # чтобы у отсоединённого (закешированного) объекта created_at был загружен
+    __mapper_args__ = {"eager_defaults": True}
+    
     __table_args__ = (
         Index('ix_users_last_active', 'last_active_date'),
         Index('ix_users_timezone', 'timezone'),
+        # Частичный индекс для джобов уведомлений: только пользователи с включёнными напоминаниями
+        Index('ix_users_notif_enabled', 'notifications_enabled', 'timezone',
+              sqlite_where=text("notifications_enabled = 1")),
     )
 
 
@@ -89,7 +98,8 @@ class WaterLog(Base):
     user = relationship("User", back_populates="water_logs")
     
     __table_args__ = (
-        Index('ix_water_logs_user_date', 'user_id', 'logged_date'),
+        # effective_ml в индексе: суммы по пользователю и дате читаются только из индекса
+        Index('ix_water_logs_user_date_ml', 'user_id', 'logged_date', 'effective_ml'),
         Index('ix_water_logs_date', 'logged_date'),
     )
 
@@ -97,18 +107,16 @@ class WaterLog(Base):
 class UserAchievement(Base):
     __tablename__ = "achievements"
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    
-    achievement_type = Column(SQLEnum(AchievementType), nullable=False)
+    # Естественный ключ: одна ачивка каждого типа на пользователя
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    achievement_type = Column(SQLEnum(AchievementType), primary_key=True)
     earned_at = Column(DateTime, default=datetime.utcnow)
     context = Column(Text, nullable=True)
     
     user = relationship("User", back_populates="achievements")
     
-    __table_args__ = (
-        Index('ix_achievements_user_type', 'user_id', 'achievement_type', unique=True),
-    )
+    # Таблица кластеризована по (user_id, achievement_type) — без rowid и отдельного индекса
+    __table_args__ = {"sqlite_with_rowid": False}
 
 
 class Insight(Base):
@@ -124,6 +132,10 @@ class Insight(Base):
     is_read = Column(Boolean, default=False)
     
     user = relationship("User", back_populates="insights")
+    
+    __table_args__ = (
+        Index('ix_insights_user_unread', 'user_id', 'is_read', sqlite_where=text("is_read = 0")),
+    )
 
 
 class NotificationSchedule(Base):
@@ -144,6 +156,8 @@ class NotificationSchedule(Base):
     user = relationship("User", back_populates="notifications")
     
     __table_args__ = (
-        Index('ix_notifications_pending', 'scheduled_time', 'is_sent'),
-        Index('ix_notifications_user', 'user_id'),
+        # Частичный индекс: планировщик читает только неотправленные уведомления
+        Index('ix_notif_pending', 'scheduled_time', sqlite_where=text("is_sent = 0")),
+        # delete_future_notifications / reschedule фильтруют по user_id + scheduled_time
+        Index('ix_notifications_user_time', 'user_id', 'scheduled_time'),
     )
\ No newline at end of file
@@ -4,6 +4,7 @@ Handlers for notification settings
 
 import asyncio
 import logging
+from typing import Tuple
 from datetime import datetime
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -11,7 +12,7 @@ from telegram.ext import ContextTypes
 
 from config import Locale
 from db import (
-    get_user, update_user, delete_future_notifications,
+    get_user, update_user, toggle_notifications_enabled, delete_future_notifications,
     reschedule_smart_notifications
 )
 from notifications.keyboards import (
@@ -48,7 +49,12 @@ async def cb_settings_notifications(update: Update, context: ContextTypes.DEFAUL
     # Clean up any stale temp data
     clean_user_notification_data(context, user_id)
     
-    # Format current settings
+    text, keyboard = _build_notifications_settings(user, lang)
+    await safe_edit_message(query, text, parse_mode="Markdown", reply_markup=keyboard)
+
+
+def _build_notifications_settings(user, lang: str) -> Tuple[str, InlineKeyboardMarkup]:
+    """Text and keyboard of the notification settings screen"""
     enabled = user.notifications_enabled
     start_min = user.notification_start_minutes or 480
     end_min = user.notification_end_minutes or 1320
@@ -61,13 +67,7 @@ async def cb_settings_notifications(update: Update, context: ContextTypes.DEFAUL
         f"⏰ **{'Время:' if lang == 'ru' else 'Time:'}** {format_notification_time(start_min)} - {format_notification_time(end_min)}\n\n"
         f"_{'Настройте время получения уведомлений' if lang == 'ru' else 'Configure when you want to receive notifications'}_"
     )
-    
-    await safe_edit_message(
-        query,
-        text,
-        parse_mode="Markdown",
-        reply_markup=get_notifications_settings_keyboard(enabled, start_min, end_min, lang)
-    )
+    return text, get_notifications_settings_keyboard(enabled, start_min, end_min, lang)
 
 
 @require_registration
@@ -79,15 +79,11 @@ async def cb_toggle_notifications(update: Update, context: ContextTypes.DEFAULT_
     user_id = update.effective_user.id
     lang = get_user_locale(update)
     
-    user = await get_user(user_id)
-    
-    if not user:
+    # Переключаем одним UPDATE ... RETURNING, без предварительного чтения пользователя
+    new_state = await toggle_notifications_enabled(user_id)
+    if new_state is None:
         return
     
-    # Toggle
-    new_state = not user.notifications_enabled
-    await update_user(user_id, notifications_enabled=new_state)
-    
     if new_state:
         # Reschedule if turned on
         await reschedule_smart_notifications(user_id)
@@ -350,13 +346,14 @@ async def cb_time_custom(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def handle_custom_time_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle custom time input"""
-    if "waiting_custom_time" not in context.user_data:
+    user_data = context.user_data
+    time_data = user_data.get("waiting_custom_time")
+    if time_data is None:
         return
     
     user_id = update.effective_user.id
     lang = get_user_locale(update)
     
-    time_data = context.user_data["waiting_custom_time"]
     time_type = time_data["type"]
     
     # Validate input
@@ -378,35 +375,15 @@ async def handle_custom_time_input(update: Update, context: ContextTypes.DEFAULT
     await reschedule_smart_notifications(user_id)
     
     # Clear waiting state
-    context.user_data.pop("waiting_custom_time", None)
+    user_data.pop("waiting_custom_time", None)
     clean_user_notification_data(context, user_id)
     
     await update.message.reply_text(
         "✅ " + ("Время установлено!" if lang == "ru" else "Time set!")
     )
     
-    # Создаем искусственный callback_query для возврата в настройки
-    # Это более безопасный подход, чем MockCallbackQuery
-    from telegram import CallbackQuery
-    from types import SimpleNamespace
-    
-    # Создаем объект, похожий на CallbackQuery
-    fake_query = SimpleNamespace()
-    fake_query.message = update.message
-    fake_query.from_user = update.effective_user
-    
-    async def fake_answer():
-        pass
-    
-    fake_query.answer = fake_answer
-    
-    # Временно подменяем callback_query в update
-    original_callback_query = update.callback_query
-    update.callback_query = fake_query
-    
-    try:
-        # Возвращаемся в настройки уведомлений
-        await cb_settings_notifications(update, context)
-    finally:
-        # Восстанавливаем оригинальный callback_query
-        update.callback_query = original_callback_query
\ No newline at end of file
+    # Экран настроек отправляем новым сообщением: подменять callback_query в Update не нужно
+    user = await get_user(user_id)
+    if user:
+        text, keyboard = _build_notifications_settings(user, lang)
+        await update.message.reply_text(text, parse_mode="Markdown", reply_markup=keyboard)
@@ -2,19 +2,22 @@
 Scheduled jobs for notifications
 """
 
+import asyncio
 import json
 import logging
 import random
 from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
-from typing import Optional
+from typing import List, Optional
 
+from sqlalchemy import select
 from telegram.ext import ContextTypes
 
-from config import Locale, config
+from config import Locale, config, get_zone
+from db.session import session_manager
+from db.models import User
 from db import (
     get_pending_notifications, 
-    mark_notification_sent, 
+    mark_notifications_sent, 
     get_user,
     get_today_total,
     reschedule_smart_notifications,
@@ -26,6 +29,9 @@ from water.keyboards import get_notification_keyboard
 
 logger = logging.getLogger(__name__)
 
+# Сколько уведомлений отправляется одновременно за один проход job_minute_check
+_SEND_CONCURRENCY = 10
+
 
 async def job_minute_check(context: ContextTypes.DEFAULT_TYPE):
     """
@@ -37,12 +43,28 @@ async def job_minute_check(context: ContextTypes.DEFAULT_TYPE):
     if pending:
         logger.debug(f"Found {len(pending)} pending notifications")
 
-    for notif in pending:
+    # Время прохода определяется RTT до Bot API, поэтому отправляем параллельно,
+    # но не больше _SEND_CONCURRENCY запросов сразу — иначе упрёмся во flood-лимит Telegram
+    semaphore = asyncio.Semaphore(_SEND_CONCURRENCY)
+    sent_ids: List[int] = []
+    try:
+        await asyncio.gather(
+            *(_process_notification(context, notif, semaphore, sent_ids) for notif in pending)
+        )
+    finally:
+        # Отметки об отправке копятся и пишутся одним UPDATE в конце прохода — даже если
+        # проход отменили на середине, иначе уже доставленное уйдёт повторно через минуту
+        await mark_notifications_sent(sent_ids)
+
+
+async def _process_notification(context, notif, semaphore: asyncio.Semaphore, sent_ids: List[int]) -> None:
+    """Send one scheduled notification and record its id once it can be marked as sent"""
+    async with semaphore:
         try:
             user = await get_user(notif.user_id)
             if not user or not user.notifications_enabled:
-                await mark_notification_sent(notif.id)
-                continue
+                sent_ids.append(notif.id)
+                return
 
             lang = user.language or "ru"
             
@@ -55,10 +77,11 @@ async def job_minute_check(context: ContextTypes.DEFAULT_TYPE):
             else:
                 await send_generic_notification(context, user, notif, lang)
 
-            await mark_notification_sent(notif.id)
+            sent_ids.append(notif.id)
             logger.info(f"Sent {notif.notification_type} notification to user {user.id}")
 
         except Exception as e:
+            # Ошибка одного пользователя не мешает остальным: уведомление повторится через минуту
             logger.error(f"Failed to send notification {notif.id}: {e}")
 
 
@@ -185,26 +208,26 @@ async def create_daily_morning_evening_notifications(context: ContextTypes.DEFAU
     Создаёт утренние и вечерние уведомления для всех пользователей на следующий день.
     Запускается раз в день в 00:05.
     """
-    from db.session import session_manager
-    from db.models import User
-    from sqlalchemy import select
-    
     logger.info("Creating morning/evening notifications for tomorrow")
     
     try:
         async with session_manager.session() as session:
             # Получаем всех пользователей с включёнными уведомлениями
+            # Только нужные колонки: строки Row вместо полных ORM-объектов User
             result = await session.execute(
-                select(User).where(User.notifications_enabled == True)
+                select(
+                    User.id, User.timezone,
+                    User.notification_start_minutes, User.notification_end_minutes
+                ).where(User.notifications_enabled == True)
             )
-            users = result.scalars().all()
+            users = result.all()
             
             tomorrow = datetime.now() + timedelta(days=1)
             created_count = 0
             
             for user in users:
                 try:
-                    tz = ZoneInfo(user.timezone or "UTC")
+                    tz = get_zone(user.timezone or "UTC")
                     start_min = user.notification_start_minutes or 480   # 8:00 по умолчанию
                     end_min = user.notification_end_minutes or 1320      # 22:00 по умолчанию
                     
@@ -218,7 +241,7 @@ async def create_daily_morning_evening_notifications(context: ContextTypes.DEFAU
                     await schedule_notification(
                         user_id=user.id,
                         notification_type="morning",
-                        scheduled_utc=morning_time.astimezone(ZoneInfo("UTC")).replace(tzinfo=None),
+                        scheduled_utc=morning_time.astimezone(get_zone("UTC")).replace(tzinfo=None),
                         context={"type": "morning"}
                     )
                     
@@ -232,7 +255,7 @@ async def create_daily_morning_evening_notifications(context: ContextTypes.DEFAU
                     await schedule_notification(
                         user_id=user.id,
                         notification_type="evening",
-                        scheduled_utc=evening_time.astimezone(ZoneInfo("UTC")).replace(tzinfo=None),
+                        scheduled_utc=evening_time.astimezone(get_zone("UTC")).replace(tzinfo=None),
                         context={"type": "evening"}
                     )
                     
@@ -255,32 +278,30 @@ async def job_daily_reset(context: ContextTypes.DEFAULT_TYPE):
     """
     reset_hour = getattr(config, 'STREAK_RESET_HOUR', 6)
     
-    from db.session import session_manager
-    from db.models import User
-    from sqlalchemy import select
-    
-    now_utc = datetime.utcnow().replace(tzinfo=ZoneInfo("UTC"))
+    now_utc = datetime.utcnow().replace(tzinfo=get_zone("UTC"))
     
     try:
+        # Для проверки нужны только id и таймзона; сессия закрывается до перепланирования,
+        # которое открывает свои
         async with session_manager.session() as session:
             result = await session.execute(
-                select(User).where(User.notifications_enabled == True)
+                select(User.id, User.timezone).where(User.notifications_enabled == True)
             )
-            users = result.scalars().all()
-            
-            logger.debug(f"Daily reset check: found {len(users)} users with notifications enabled")
-            
-            for user in users:
-                try:
-                    tz = ZoneInfo(user.timezone or "UTC")
-                    local_now = now_utc.astimezone(tz)
-                    
-                    # Check if it's time for daily reset (within 5 min window)
-                    if local_now.hour == reset_hour and local_now.minute < 5:
-                        logger.info(f"Running daily reset for user {user.id}")
-                        await reschedule_smart_notifications(user.id)
-                except Exception as e:
-                    logger.error(f"Error in daily reset for user {user.id}: {e}")
+            users = result.all()
+        
+        logger.debug(f"Daily reset check: found {len(users)} users with notifications enabled")
+        
+        for user_id, tz_name in users:
+            try:
+                tz = get_zone(tz_name or "UTC")
+                local_now = now_utc.astimezone(tz)
+                
+                # Check if it's time for daily reset (within 5 min window)
+                if local_now.hour == reset_hour and local_now.minute < 5:
+                    logger.info(f"Running daily reset for user {user_id}")
+                    await reschedule_smart_notifications(user_id)
+            except Exception as e:
+                logger.error(f"Error in daily reset for user {user_id}: {e}")
     except Exception as e:
         logger.error(f"Error in job_daily_reset: {e}")
 
@@ -299,7 +320,7 @@ def register_jobs(application):
         from datetime import time
         job_queue.run_daily(
             create_daily_morning_evening_notifications,
-            time=time(hour=0, minute=5, tzinfo=ZoneInfo("UTC"))
+            time=time(hour=0, minute=5, tzinfo=get_zone("UTC"))
         )
         
         logger.info("JobQueue initialized: minute checks, daily reset, and morning/evening creation.")
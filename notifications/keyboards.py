@@ -48,8 +48,7 @@ def get_notifications_settings_keyboard(
     return InlineKeyboardMarkup(keyboard)
 
 
-def get_notification_presets_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
-    """Keyboard for notification presets"""
+def _build_presets_keyboard(lang: str) -> InlineKeyboardMarkup:
     keyboard = []
     
     for preset_id, preset in NOTIFICATION_PRESETS.items():
@@ -73,6 +72,22 @@ def get_notification_presets_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+# Статичные клавиатуры собираются один раз при импорте (разметка неизменяемая)
+_PRESETS_KB = {lang: _build_presets_keyboard(lang) for lang in ("ru", "en")}
+_NOTIFICATION_KB = {
+    lang: InlineKeyboardMarkup([[InlineKeyboardButton(
+        Locale.get("main_add_water", lang),
+        callback_data="add_water"
+    )]])
+    for lang in ("ru", "en")
+}
+
+
+def get_notification_presets_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
+    """Keyboard for notification presets"""
+    return _PRESETS_KB["ru" if lang == "ru" else "en"]
+
+
 def get_time_picker_keyboard(
     time_type: str,  # "start" or "end"
     current_minutes: int,
@@ -170,10 +185,4 @@ def get_minute_picker_keyboard(
 
 def get_notification_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for notification messages with quick add"""
-    keyboard = [
-        [InlineKeyboardButton(
-            Locale.get("main_add_water", lang),
-            callback_data="add_water"
-        )]
-    ]
-    return InlineKeyboardMarkup(keyboard)
\ No newline at end of file
+    return _NOTIFICATION_KB["ru" if lang == "ru" else "en"]
@@ -2,13 +2,13 @@
 Utility functions for notifications module
 """
 
-import re
 import logging
 from typing import Optional, Tuple, Dict
 from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
 
+from config import get_zone
 from notifications.constants import NOTIFICATION_PRESETS, TIME_CATEGORIES
+from common.helpers import parse_time
 
 logger = logging.getLogger(__name__)
 
@@ -26,12 +26,10 @@ def parse_notification_time(time_str: str) -> Optional[int]:
     Returns None if invalid
     """
     # Поддерживаем форматы "ЧЧ:ММ" и "Ч:ММ"
-    match = re.match(r'^([0-9]|0[0-9]|1[0-9]|2[0-3]):([0-5][0-9])$', time_str.strip())
-    if match:
-        hour = int(match.group(1))
-        minute = int(match.group(2))
-        return hour * 60 + minute
-    return None
+    parsed = parse_time(time_str.strip())
+    if parsed is None:
+        return None
+    return parsed[0] * 60 + parsed[1]
 
 
 def validate_notification_time(time_str: str) -> Tuple[bool, Optional[int]]:
@@ -118,7 +116,7 @@ def calculate_next_notification_time(
     Correctly handles windows that cross midnight.
     """
     try:
-        tz = ZoneInfo(timezone)
+        tz = get_zone(timezone)
         local_time = current_time.astimezone(tz)
         local_minutes = local_time.hour * 60 + local_time.minute
         
@@ -185,7 +183,7 @@ def calculate_next_notification_time(
         if next_local <= local_time:
             next_local += timedelta(days=1)
         
-        return next_local.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
+        return next_local.astimezone(get_zone("UTC")).replace(tzinfo=None)
         
     except Exception as e:
         logger.error(f"Error calculating next notification time: {e}")
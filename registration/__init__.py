@@ -28,10 +28,10 @@ from registration.utils import (
     validate_weight,
     validate_height,
     validate_city,
-    get_user_locale,
     format_registration_complete,
     calculate_user_norm
 )
+from common.helpers import get_user_locale
 from common.decorators import require_registration
 
 
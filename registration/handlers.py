@@ -2,18 +2,22 @@
 Handlers for registration process
 """
 
+import asyncio
 import logging
 from typing import Dict, Any
 
 from telegram import Update, InlineKeyboardMarkup
-from telegram.ext import ContextTypes, ConversationHandler, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+from telegram.ext import (
+    ContextTypes, ConversationHandler, CommandHandler, MessageHandler, CallbackQueryHandler,
+    TypeHandler, filters
+)
 
-from config import Locale, Gender, ActivityLevel
+from config import Locale, Gender, ActivityLevel, get_main_keyboard
 from db import (
     get_or_create_user, update_user, complete_registration,
-    reschedule_smart_notifications, get_user
+    reschedule_smart_notifications, get_user, get_today_total
 )
-from services import calculate_water_norm, weather_service
+from services import calculate_water_norm, weather_service, get_user_daily_norm_async, format_main_message
 
 from registration.states import (
     STATE_START, STATE_WEIGHT, STATE_HEIGHT, STATE_GENDER,
@@ -23,15 +27,39 @@ from registration.states import (
 from registration.keyboards import (
     get_start_keyboard, get_gender_keyboard, get_activity_keyboard,
     get_city_keyboard, get_cancel_keyboard, get_back_keyboard,
-    get_profile_edit_keyboard
+    get_profile_edit_keyboard, GENDER_CALLBACKS, ACTIVITY_CALLBACKS
 )
 from registration.utils import (
     validate_weight, validate_height, validate_city,
-    get_user_locale, format_registration_complete, extract_user_data
+    format_registration_complete, extract_user_data,
+    RegistrationDraft
 )
+from common.helpers import get_user_locale
 
 logger = logging.getLogger(__name__)
 
+# Кнопки мастера регистрации одноразовые: после нажатия сообщение заменяется.
+# Telegram держит ответ на callback в кэше клиента, и повторные тапы по той же кнопке
+# в этом окне не доходят до бота и не запускают шаг второй раз
+_ANSWER_CACHE_TIME = 2
+
+# callback_data кнопки -> значение enum; точный поиск по словарю вместо split() и Enum(...)
+_GENDER_BY_CB = {cb: g for g, cb in GENDER_CALLBACKS.items()}
+_ACTIVITY_BY_CB = {cb: a for a, cb in ACTIVITY_CALLBACKS.items()}
+
+# Брошенный на полпути диалог завершается через 30 минут тишины: иначе состояние
+# ConversationHandler и черновик в user_data живут вечно и попадают в каждый снимок PicklePersistence
+_CONVERSATION_TIMEOUT = 1800
+
+# Ключи user_data, которые нужны только пока идёт диалог
+_DIALOG_KEYS = ("registration", "editing_field")
+
+# Заголовок и текст финального экрана склеены заранее — при показе подставляется только норма
+_REG_COMPLETE_TMPL = {
+    lang: f"{L['reg_complete']}\n\n{L['reg_complete_text']}"
+    for lang, L in (("ru", Locale.RU), ("en", Locale.EN))
+}
+
 
 # ============================================================================
 # REGISTRATION HANDLERS
@@ -57,18 +85,29 @@ async def start_registration(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await reschedule_smart_notifications(user.id)
         return await send_main_menu(update, context)
     
-    # Start onboarding
     L = Locale.RU if lang == "ru" else Locale.EN
-    welcome_text = f"{L['welcome_title']}\n\n{L['welcome_text']}"
     
-    # Initialize registration context
-    context.user_data["registration"] = {
-        "weight": None,
-        "height": None,
-        "gender": None,
-        "activity": None,
-        "city": None
-    }
+    # Каждый шаг сразу пишется в users, поэтому после рестарта бота (user_data и
+    # состояние диалога живут только в памяти) регистрация продолжается с первого пустого шага
+    context.user_data["registration"] = RegistrationDraft(
+        weight=user.weight, height=user.height, gender=user.gender
+    )
+    
+    if user.weight and not user.height:
+        await update.message.reply_text(
+            f"{L['reg_height']}\n\n_{L['reg_height_hint']}_",
+            parse_mode="Markdown"
+        )
+        return STATE_HEIGHT
+    if user.height and not user.gender:
+        await update.message.reply_text(L["reg_gender"], reply_markup=get_gender_keyboard(lang))
+        return STATE_GENDER
+    if user.gender:
+        await update.message.reply_text(L["reg_activity"], reply_markup=get_activity_keyboard(lang))
+        return STATE_ACTIVITY
+    
+    # Start onboarding
+    welcome_text = f"{L['welcome_title']}\n\n{L['welcome_text']}"
     
     await update.message.reply_text(
         welcome_text,
@@ -80,15 +119,18 @@ async def start_registration(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def onboarding_weight(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Ask for weight"""
     query = update.callback_query
-    await query.answer()
     
     lang = get_user_locale(update)
     L = Locale.RU if lang == "ru" else Locale.EN
     
-    await query.edit_message_text(
-        f"{L['reg_weight']}\n\n_{L['reg_weight_hint']}_",
-        parse_mode="Markdown",
-        reply_markup=get_cancel_keyboard(lang)
+    # answer и edit — независимые запросы к Bot API, отправляем их параллельно
+    await asyncio.gather(
+        query.answer(cache_time=_ANSWER_CACHE_TIME),
+        query.edit_message_text(
+            f"{L['reg_weight']}\n\n_{L['reg_weight_hint']}_",
+            parse_mode="Markdown",
+            reply_markup=get_cancel_keyboard(lang)
+        ),
     )
     return STATE_WEIGHT
 
@@ -107,7 +149,7 @@ async def process_weight(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     # Save weight
     await update_user(user_id, weight=weight)
-    context.user_data["registration"]["weight"] = weight
+    context.user_data["registration"].weight = weight
     
     await update.message.reply_text(
         f"{L['reg_height']}\n\n_{L['reg_height_hint']}_",
@@ -130,7 +172,7 @@ async def process_height(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     # Save height
     await update_user(user_id, height=height)
-    context.user_data["registration"]["height"] = height
+    context.user_data["registration"].height = height
     
     await update.message.reply_text(
         L["reg_gender"],
@@ -142,22 +184,26 @@ async def process_height(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 async def process_gender(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process gender selection"""
     query = update.callback_query
-    await query.answer()
     
     user_id = update.effective_user.id
     lang = get_user_locale(update)
     
-    gender_str = query.data.split("_")[1]
-    gender = Gender(gender_str)
+    gender = _GENDER_BY_CB.get(query.data)
+    if gender is None:
+        await query.answer(cache_time=_ANSWER_CACHE_TIME)
+        return STATE_GENDER
     
     # Save gender
     await update_user(user_id, gender=gender)
-    context.user_data["registration"]["gender"] = gender
+    context.user_data["registration"].gender = gender
     
     L = Locale.RU if lang == "ru" else Locale.EN
-    await query.edit_message_text(
-        L["reg_activity"],
-        reply_markup=get_activity_keyboard(lang)
+    await asyncio.gather(
+        query.answer(cache_time=_ANSWER_CACHE_TIME),
+        query.edit_message_text(
+            L["reg_activity"],
+            reply_markup=get_activity_keyboard(lang)
+        ),
     )
     return STATE_ACTIVITY
 
@@ -165,35 +211,38 @@ async def process_gender(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 async def process_activity(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process activity level selection"""
     query = update.callback_query
-    await query.answer()
     
     user_id = update.effective_user.id
     lang = get_user_locale(update)
     
-    activity_str = query.data.split("_")[1]
-    activity = ActivityLevel(activity_str)
+    activity = _ACTIVITY_BY_CB.get(query.data)
+    if activity is None:
+        await query.answer(cache_time=_ANSWER_CACHE_TIME)
+        return STATE_ACTIVITY
     
     # Save activity and set default timezone
     await update_user(user_id, activity_level=activity, timezone="UTC")
-    context.user_data["registration"]["activity"] = activity
+    context.user_data["registration"].activity = activity
     
     L = Locale.RU if lang == "ru" else Locale.EN
-    await query.edit_message_text(
-        f"{L['reg_city']}\n\n_{L['reg_city_hint']}_",
-        parse_mode="Markdown",
-        reply_markup=get_city_keyboard(lang)
+    await asyncio.gather(
+        query.answer(cache_time=_ANSWER_CACHE_TIME),
+        query.edit_message_text(
+            f"{L['reg_city']}\n\n_{L['reg_city_hint']}_",
+            parse_mode="Markdown",
+            reply_markup=get_city_keyboard(lang)
+        ),
     )
     return STATE_CITY
 
 
 async def process_city(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process city input or skip"""
-    user_id = update.effective_user.id
     lang = get_user_locale(update)
     
     # Handle skip callback
     if update.callback_query:
-        await update.callback_query.answer()
+        await update.callback_query.answer(cache_time=_ANSWER_CACHE_TIME)
         if update.callback_query.data == "skip_city":
             return await complete_registration_flow(update, context)
         return STATE_CITY
@@ -206,24 +255,22 @@ async def process_city(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         await update.message.reply_text(L[error_key])
         return STATE_CITY
     
-    # Save city
-    await update_user(user_id, city=city)
-    context.user_data["registration"]["city"] = city
+    # City is saved together with the completion flag
+    context.user_data["registration"].city = city
     
-    return await complete_registration_flow(update, context)
+    return await complete_registration_flow(update, context, city=city)
 
 
-async def complete_registration_flow(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+async def complete_registration_flow(update: Update, context: ContextTypes.DEFAULT_TYPE, **fields) -> int:
     """Complete registration and show main menu"""
     user_id = update.effective_user.id
     lang = get_user_locale(update)
-    L = Locale.RU if lang == "ru" else Locale.EN
     
-    # Mark registration as complete
-    await complete_registration(user_id)
+    # Mark registration as complete; the returned user is reused instead of reading it back
+    user = await complete_registration(user_id, **fields)
+    context.user_data.pop("registration", None)
     
     # Calculate and show norm
-    user = await get_user(user_id)
     result = calculate_water_norm(
         weight=user.weight,
         gender=user.gender or Gender.MALE,
@@ -234,14 +281,11 @@ async def complete_registration_flow(update: Update, context: ContextTypes.DEFAU
     await reschedule_smart_notifications(user_id)
     
     # Send completion message
+    text = _REG_COMPLETE_TMPL["ru" if lang == "ru" else "en"].format(norm=result.final_norm)
     if update.callback_query:
-        await update.callback_query.edit_message_text(
-            f"{L['reg_complete']}\n\n{L['reg_complete_text'].format(norm=result.final_norm)}"
-        )
+        await update.callback_query.edit_message_text(text)
     else:
-        await update.message.reply_text(
-            f"{L['reg_complete']}\n\n{L['reg_complete_text'].format(norm=result.final_norm)}"
-        )
+        await update.message.reply_text(text)
     
     # Import here to avoid circular imports
     return await send_main_menu(update, context)
@@ -250,12 +294,21 @@ async def complete_registration_flow(update: Update, context: ContextTypes.DEFAU
 async def cancel_registration(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel registration process"""
     query = update.callback_query
-    await query.answer()
     
     lang = get_user_locale(update)
     L = Locale.RU if lang == "ru" else Locale.EN
     
-    await query.edit_message_text(L["btn_cancel"])
+    context.user_data.pop("registration", None)
+    await asyncio.gather(query.answer(cache_time=_ANSWER_CACHE_TIME), query.edit_message_text(L["btn_cancel"]))
+    return ConversationHandler.END
+
+
+async def conversation_timed_out(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Drop leftovers of an abandoned registration or profile edit"""
+    user_data = context.user_data
+    if user_data is not None:
+        for key in _DIALOG_KEYS:
+            user_data.pop(key, None)
     return ConversationHandler.END
 
 
@@ -263,6 +316,32 @@ async def cancel_registration(update: Update, context: ContextTypes.DEFAULT_TYPE
 # PROFILE EDITING HANDLERS
 # ============================================================================
 
+def _build_profile_template(L: dict) -> str:
+    return (
+        f"👤 **{L['profile_title']}**\n\n"
+        f"⚖️ {L['profile_weight']}: {{weight}} кг\n"
+        f"📏 {L['profile_height']}: {{height}} см\n"
+        f"👤 {L['profile_gender']}: {{gender}}\n"
+        f"🏃 {L['profile_activity']}: {{activity}}\n"
+        f"🏙️ {L['profile_city']}: {{city}}\n"
+        f"⏰ {L.get('notifications', 'Уведомления')}: {{start}} - {{end}}\n"
+    )
+
+
+# Подписи профиля подставлены заранее; при показе заполняются только значения
+_PROFILE_TMPL = {"ru": _build_profile_template(Locale.RU), "en": _build_profile_template(Locale.EN)}
+
+# Локализованные подписи пола и активности — те же, что на кнопках выбора; считаются один раз
+_GENDER_LABELS = {
+    lang: {Gender.MALE: Locale.get("btn_male", lang), Gender.FEMALE: Locale.get("btn_female", lang)}
+    for lang in ("ru", "en")
+}
+_ACTIVITY_LABELS = {
+    lang: {a: Locale.get(f"activity_{a.value}", lang) for a in ActivityLevel}
+    for lang in ("ru", "en")
+}
+
+
 async def show_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show user profile with edit options"""
     query = update.callback_query
@@ -270,7 +349,6 @@ async def show_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     
     user_id = update.effective_user.id
     lang = get_user_locale(update)
-    L = Locale.RU if lang == "ru" else Locale.EN
     user = await get_user(user_id)
     
     if not user:
@@ -279,18 +357,17 @@ async def show_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     # Format notification time
     start_min = user.notification_start_minutes or 480
     end_min = user.notification_end_minutes or 1320
-    start_str = f"{start_min//60:02d}:{start_min%60:02d}"
-    end_str = f"{end_min//60:02d}:{end_min%60:02d}"
     
-    text = (
-        f"👤 **{L['profile_title']}**\n\n"
-        f"⚖️ {L['profile_weight']}: {user.weight or '?'} кг\n"
-        f"📏 {L['profile_height']}: {user.height or '?'} см\n"
-        f"👤 {L['profile_gender']}: {str(user.gender.value) if user.gender else '?'}\n"
-        f"🏃 {L['profile_activity']}: {str(user.activity_level.value) if user.activity_level else '?'}\n"
-        f"🏙️ {L['profile_city']}: {user.city or '-'}\n"
-        f"⏰ {L.get('notifications', 'Уведомления')}: {start_str} - {end_str}\n"
-    )
+    lang = "ru" if lang == "ru" else "en"
+    text = _PROFILE_TMPL[lang].format_map({
+        "weight": user.weight or "?",
+        "height": user.height or "?",
+        "gender": _GENDER_LABELS[lang].get(user.gender, "?"),
+        "activity": _ACTIVITY_LABELS[lang].get(user.activity_level, "?"),
+        "city": user.city or "-",
+        "start": f"{start_min//60:02d}:{start_min%60:02d}",
+        "end": f"{end_min//60:02d}:{end_min%60:02d}",
+    })
     
     await query.edit_message_text(
         text,
@@ -299,10 +376,23 @@ async def show_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     )
 
 
+def _back_to_profile_keyboard(lang: str) -> InlineKeyboardMarkup:
+    return get_back_keyboard(lang, "settings_profile")
+
+
+# Поле профиля -> (ключ подсказки, клавиатура, следующее состояние)
+_EDIT_PROMPTS = {
+    "weight": ("profile_edit_weight", _back_to_profile_keyboard, STATE_EDIT_WEIGHT),
+    "height": ("profile_edit_height", _back_to_profile_keyboard, STATE_EDIT_HEIGHT),
+    "city": ("profile_edit_city", _back_to_profile_keyboard, STATE_EDIT_CITY),
+    "gender": ("reg_gender", get_gender_keyboard, ConversationHandler.END),
+    "activity": ("reg_activity", get_activity_keyboard, ConversationHandler.END),
+}
+
+
 async def edit_field_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Start editing a profile field"""
     query = update.callback_query
-    await query.answer()
     
     lang = get_user_locale(update)
     L = Locale.RU if lang == "ru" else Locale.EN
@@ -310,42 +400,17 @@ async def edit_field_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     field = query.data.split("_")[1]  # weight, height, city, gender, activity
     context.user_data["editing_field"] = field
     
-    if field == "weight":
-        await query.edit_message_text(
-            L["profile_edit_weight"],
-            reply_markup=get_back_keyboard(lang, "settings_profile")
-        )
-        return STATE_EDIT_WEIGHT
-    
-    elif field == "height":
-        await query.edit_message_text(
-            L["profile_edit_height"],
-            reply_markup=get_back_keyboard(lang, "settings_profile")
-        )
-        return STATE_EDIT_HEIGHT
-    
-    elif field == "city":
-        await query.edit_message_text(
-            L["profile_edit_city"],
-            reply_markup=get_back_keyboard(lang, "settings_profile")
-        )
-        return STATE_EDIT_CITY
-    
-    elif field == "gender":
-        await query.edit_message_text(
-            L["reg_gender"],
-            reply_markup=get_gender_keyboard(lang)
-        )
-        return ConversationHandler.END
-    
-    elif field == "activity":
-        await query.edit_message_text(
-            L["reg_activity"],
-            reply_markup=get_activity_keyboard(lang)
-        )
+    prompt = _EDIT_PROMPTS.get(field)
+    if prompt is None:
+        await query.answer()
         return ConversationHandler.END
     
-    return ConversationHandler.END
+    text_key, build_keyboard, next_state = prompt
+    await asyncio.gather(
+        query.answer(),
+        query.edit_message_text(L[text_key], reply_markup=build_keyboard(lang)),
+    )
+    return next_state
 
 
 async def edit_weight_process(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -422,20 +487,26 @@ async def edit_city_process(update: Update, context: ContextTypes.DEFAULT_TYPE)
     return ConversationHandler.END
 
 
+# callback_data кнопки -> (поле пользователя, значение)
+_PROFILE_CHOICES = {
+    **{cb: ("gender", g) for cb, g in _GENDER_BY_CB.items()},
+    **{cb: ("activity_level", a) for cb, a in _ACTIVITY_BY_CB.items()},
+}
+
+
 async def update_gender_activity(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Update gender or activity from callback"""
     query = update.callback_query
     await query.answer()
     
     user_id = update.effective_user.id
-    data = query.data
     
-    if data.startswith("gender_"):
-        gender = Gender(data.split("_")[1])
-        await update_user(user_id, gender=gender)
-    elif data.startswith("activity_"):
-        activity = ActivityLevel(data.split("_")[1])
-        await update_user(user_id, activity_level=activity)
+    choice = _PROFILE_CHOICES.get(query.data)
+    if choice is None:
+        return
+    
+    field, value = choice
+    await update_user(user_id, **{field: value})
     
     # Reschedule notifications (norm changed)
     await reschedule_smart_notifications(user_id)
@@ -482,11 +553,13 @@ def get_registration_conversation_handler():
                 CallbackQueryHandler(process_city, pattern="^skip_city$"),
                 CallbackQueryHandler(cancel_registration, pattern="^cancel_registration$")
             ],
+            ConversationHandler.TIMEOUT: [TypeHandler(Update, conversation_timed_out)],
         },
         fallbacks=[
             CallbackQueryHandler(cancel_registration, pattern="^cancel_registration$"),
             CommandHandler("cancel", cancel_registration)
         ],
+        conversation_timeout=_CONVERSATION_TIMEOUT,
         name="registration_conversation",
         persistent=False,
         per_user=True,
@@ -512,11 +585,13 @@ def get_profile_edit_handlers():
                 MessageHandler(filters.TEXT & ~filters.COMMAND, edit_city_process),
                 CallbackQueryHandler(show_profile, pattern="^settings_profile$")
             ],
+            ConversationHandler.TIMEOUT: [TypeHandler(Update, conversation_timed_out)],
         },
         fallbacks=[
             CallbackQueryHandler(show_profile, pattern="^settings_profile$"),
             CommandHandler("cancel", show_profile)
         ],
+        conversation_timeout=_CONVERSATION_TIMEOUT,
         name="profile_edit_conversation",
         persistent=False,
         per_user=True,
@@ -526,11 +601,6 @@ def get_profile_edit_handlers():
 
 async def send_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send main menu to user (defined here to avoid circular imports)"""
-    from common.helpers import get_user_locale
-    from config import get_main_keyboard
-    from db import get_user, get_today_total
-    from services import get_user_daily_norm_async, weather_service, format_main_message  # ИСПРАВЛЕНО: импортируем асинхронную версию
-    
     user_id = update.effective_user.id
     lang = get_user_locale(update)
     
@@ -7,72 +7,106 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from config import Locale, Gender, ActivityLevel
 from registration.states import STATE_CITY
 
+# callback_data для кнопок выбора — единственное место, где задан формат;
+# обработчики регистрации строят обратные словари из этих же таблиц
+GENDER_CALLBACKS = {g: f"gender_{g.value}" for g in Gender}
+ACTIVITY_CALLBACKS = {a: f"activity_{a.value}" for a in ActivityLevel}
+
+_LANGS = ("ru", "en")
+
+
+def _lang(lang: str) -> str:
+    return "ru" if lang == "ru" else "en"
+
+
+def _single_button(text_key: str, callback_data: str) -> dict:
+    """One-button keyboard per language"""
+    return {
+        lang: InlineKeyboardMarkup([[InlineKeyboardButton(Locale.get(text_key, lang), callback_data=callback_data)]])
+        for lang in _LANGS
+    }
+
+
+# Все клавиатуры регистрации статичны: строятся при импорте и переиспользуются на каждом шаге
+_START_KB = _single_button("btn_start", "start_registration")
+_CITY_KB = _single_button("reg_skip", "skip_city")
+_CANCEL_KB = _single_button("btn_cancel", "cancel_registration")
+
+_GENDER_KB = {
+    lang: InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton(Locale.get("btn_male", lang), callback_data=GENDER_CALLBACKS[Gender.MALE]),
+            InlineKeyboardButton(Locale.get("btn_female", lang), callback_data=GENDER_CALLBACKS[Gender.FEMALE]),
+        ],
+    ])
+    for lang in _LANGS
+}
+
+_ACTIVITY_KB = {
+    lang: InlineKeyboardMarkup([
+        [InlineKeyboardButton(Locale.get("activity_low", lang), callback_data=ACTIVITY_CALLBACKS[ActivityLevel.LOW])],
+        [InlineKeyboardButton(Locale.get("activity_medium", lang), callback_data=ACTIVITY_CALLBACKS[ActivityLevel.MEDIUM])],
+        [InlineKeyboardButton(Locale.get("activity_high", lang), callback_data=ACTIVITY_CALLBACKS[ActivityLevel.HIGH])],
+    ])
+    for lang in _LANGS
+}
+
+_PROFILE_EDIT_KB = {
+    lang: InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton(Locale.get("profile_weight", lang), callback_data="edit_weight"),
+            InlineKeyboardButton(Locale.get("profile_height", lang), callback_data="edit_height"),
+        ],
+        [
+            InlineKeyboardButton(Locale.get("profile_gender", lang), callback_data="edit_gender"),
+            InlineKeyboardButton(Locale.get("profile_activity", lang), callback_data="edit_activity"),
+        ],
+        [InlineKeyboardButton(Locale.get("profile_city", lang), callback_data="edit_city")],
+        [InlineKeyboardButton(Locale.get("btn_back", lang), callback_data="settings")],
+    ])
+    for lang in _LANGS
+}
+
+# Кнопка "назад" зависит от callback_data, поэтому кешируется лениво по (язык, callback_data)
+_BACK_KB = {}
+
 
 def get_start_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for welcome message"""
-    keyboard = [
-        [InlineKeyboardButton(Locale.get("btn_start", lang), callback_data="start_registration")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _START_KB[_lang(lang)]
 
 
 def get_gender_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for gender selection"""
-    keyboard = [
-        [
-            InlineKeyboardButton(Locale.get("btn_male", lang), callback_data=f"gender_{Gender.MALE.value}"),
-            InlineKeyboardButton(Locale.get("btn_female", lang), callback_data=f"gender_{Gender.FEMALE.value}"),
-        ],
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _GENDER_KB[_lang(lang)]
 
 
 def get_activity_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for activity level selection"""
-    keyboard = [
-        [InlineKeyboardButton(Locale.get("activity_low", lang), callback_data=f"activity_{ActivityLevel.LOW.value}")],
-        [InlineKeyboardButton(Locale.get("activity_medium", lang), callback_data=f"activity_{ActivityLevel.MEDIUM.value}")],
-        [InlineKeyboardButton(Locale.get("activity_high", lang), callback_data=f"activity_{ActivityLevel.HIGH.value}")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _ACTIVITY_KB[_lang(lang)]
 
 
 def get_city_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for city input with skip option"""
-    keyboard = [
-        [InlineKeyboardButton(Locale.get("reg_skip", lang), callback_data="skip_city")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _CITY_KB[_lang(lang)]
 
 
 def get_cancel_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard with cancel button"""
-    keyboard = [
-        [InlineKeyboardButton(Locale.get("btn_cancel", lang), callback_data="cancel_registration")]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _CANCEL_KB[_lang(lang)]
 
 
 def get_back_keyboard(lang: str = "ru", callback_data: str = "main_menu") -> InlineKeyboardMarkup:
     """Generic back button keyboard"""
-    keyboard = [
-        [InlineKeyboardButton(Locale.get("btn_back", lang), callback_data=callback_data)]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    key = (_lang(lang), callback_data)
+    keyboard = _BACK_KB.get(key)
+    if keyboard is None:
+        keyboard = _BACK_KB[key] = InlineKeyboardMarkup(
+            [[InlineKeyboardButton(Locale.get("btn_back", key[0]), callback_data=callback_data)]]
+        )
+    return keyboard
 
 
 def get_profile_edit_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for profile editing"""
-    keyboard = [
-        [
-            InlineKeyboardButton(Locale.get("profile_weight", lang), callback_data="edit_weight"),
-            InlineKeyboardButton(Locale.get("profile_height", lang), callback_data="edit_height"),
-        ],
-        [
-            InlineKeyboardButton(Locale.get("profile_gender", lang), callback_data="edit_gender"),
-            InlineKeyboardButton(Locale.get("profile_activity", lang), callback_data="edit_activity"),
-        ],
-        [InlineKeyboardButton(Locale.get("profile_city", lang), callback_data="edit_city")],
-        [InlineKeyboardButton(Locale.get("btn_back", lang), callback_data="settings")],
-    ]
-    return InlineKeyboardMarkup(keyboard)
\ No newline at end of file
+    return _PROFILE_EDIT_KB[_lang(lang)]
@@ -3,15 +3,25 @@ Utility functions for registration process
 """
 
 import re
+from dataclasses import dataclass
 from typing import Optional, Tuple, Dict, Any
 from datetime import datetime
 
 from telegram import Update
-from zoneinfo import ZoneInfo
 
 from db import get_user, update_user
 from config import Locale, Gender, ActivityLevel
 from services import calculate_water_norm
+from common.helpers import validate_timezone
+
+
+def _parse_number(text: str) -> Optional[float]:
+    """Parse a plain decimal like "70" or "70.5" without using exceptions for control flow"""
+    text = text.strip()
+    # isascii отсекает "²", "٣" и прочие юникодные цифры, которые float() не примет
+    if text.isascii() and text.replace(".", "", 1).isdigit():
+        return float(text)
+    return None
 
 
 def validate_weight(weight_str: str) -> Tuple[bool, Optional[float], Optional[str]]:
@@ -19,14 +29,12 @@ def validate_weight(weight_str: str) -> Tuple[bool, Optional[float], Optional[st
     Validate weight input
     Returns: (is_valid, weight_value, error_message)
     """
-    try:
-        weight = float(weight_str)
-        if 30 <= weight <= 200:
-            return True, weight, None
-        else:
-            return False, None, "error_range_weight"
-    except ValueError:
+    weight = _parse_number(weight_str)
+    if weight is None:
         return False, None, "error_invalid_number"
+    if 30 <= weight <= 200:
+        return True, weight, None
+    return False, None, "error_range_weight"
 
 
 def validate_height(height_str: str) -> Tuple[bool, Optional[float], Optional[str]]:
@@ -34,14 +42,15 @@ def validate_height(height_str: str) -> Tuple[bool, Optional[float], Optional[st
     Validate height input
     Returns: (is_valid, height_value, error_message)
     """
-    try:
-        height = float(height_str)
-        if 100 <= height <= 250:
-            return True, height, None
-        else:
-            return False, None, "error_range_height"
-    except ValueError:
+    height = _parse_number(height_str)
+    if height is None:
         return False, None, "error_invalid_number"
+    if 100 <= height <= 250:
+        return True, height, None
+    return False, None, "error_range_height"
+
+
+_CITY_FORBIDDEN_RE = re.compile(r'[<>{}[\]\\]')
 
 
 def validate_city(city_str: str) -> Tuple[bool, Optional[str], Optional[str]]:
@@ -52,23 +61,14 @@ def validate_city(city_str: str) -> Tuple[bool, Optional[str], Optional[str]]:
     city = city_str.strip()
     if len(city) > 100:
         return False, None, "error_city_too_long"
-    if re.search(r'[<>{}[\]\\]', city):  # Block potential injection
+    if _CITY_FORBIDDEN_RE.search(city):  # Block potential injection
         return False, None, "error_invalid_chars"
     return True, city, None
 
 
-def get_user_locale(update: Update) -> str:
-    """Get user's language preference from Telegram"""
-    if update.effective_user:
-        lang_code = update.effective_user.language_code
-        if lang_code and lang_code.lower().startswith("ru"):
-            return "ru"
-    return "en"
-
-
-def calculate_user_norm(user_id: int) -> Dict[str, Any]:
+async def calculate_user_norm(user_id: int) -> Dict[str, Any]:
     """Calculate and return user's water norm details"""
-    user = get_user(user_id)
+    user = await get_user(user_id)
     if not user or not user.weight:
         return {}
     
@@ -86,9 +86,9 @@ def calculate_user_norm(user_id: int) -> Dict[str, Any]:
     }
 
 
-def format_registration_complete(user_id: int, lang: str = "ru") -> str:
+async def format_registration_complete(user_id: int, lang: str = "ru") -> str:
     """Format registration completion message"""
-    norm_data = calculate_user_norm(user_id)
+    norm_data = await calculate_user_norm(user_id)
     final_norm = norm_data.get("final_norm", 2000)
     
     return Locale.get("reg_complete_text", lang).format(norm=final_norm)
@@ -110,11 +110,7 @@ def get_localized_greeting(lang: str = "ru") -> str:
 
 def is_valid_timezone(tz_name: str) -> bool:
     """Check if timezone string is valid"""
-    try:
-        ZoneInfo(tz_name)
-        return True
-    except Exception:
-        return False
+    return validate_timezone(tz_name)
 
 
 def extract_user_data(update: Update) -> Dict[str, Any]:
@@ -129,13 +125,12 @@ def extract_user_data(update: Update) -> Dict[str, Any]:
     }
 
 
-def create_registration_context() -> Dict[str, Any]:
-    """Create empty registration context"""
-    return {
-        "weight": None,
-        "height": None,
-        "gender": None,
-        "activity": None,
-        "city": None,
-        "timezone": "UTC"
-    }
\ No newline at end of file
+@dataclass(slots=True)
+class RegistrationDraft:
+    """Answers collected during onboarding (kept in context.user_data["registration"])"""
+    weight: Optional[float] = None
+    height: Optional[float] = None
+    gender: Optional[Gender] = None
+    activity: Optional[ActivityLevel] = None
+    city: Optional[str] = None
+    timezone: str = "UTC"
\ No newline at end of file
@@ -5,20 +5,23 @@ Water calculation, weather, achievements, insights
 
 import asyncio
 import aiohttp
+import json
 import math
 from datetime import datetime, date, timedelta
 from typing import Optional, Dict, List, Tuple
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 
 from config import (
     Gender, ActivityLevel, ActivityMode, DrinkType, AchievementType,
-    DRINK_COEFFICIENTS, ACHIEVEMENTS, config, Locale
+    DRINK_COEFFICIENTS, ACHIEVEMENTS, config, Locale, get_zone
 )
 from db import (
-    get_user, update_user, get_today_total, get_date_total,
+    get_user, get_user_timezone, update_user, get_today_total, get_date_total,
     add_achievement, has_achievement, update_streak, check_streak_lost,
-    get_week_stats, get_month_heatmap, add_insight, export_to_dict, export_to_csv,
-    get_logs_for_period, get_drink_breakdown
+    get_week_stats, get_month_heatmap, add_insights, export_to_dict, export_to_csv,
+    get_intake_points, get_drink_breakdown
 )
 
 
@@ -26,7 +29,27 @@ from db import (
 # WATER NORM CALCULATION
 # ============================================================================
 
-@dataclass
+# Коэффициенты формулы нормы — константы модуля, а не литералы внутри функции
+_ACTIVITY_K = {
+    ActivityLevel.LOW: 1.0,
+    ActivityLevel.MEDIUM: 1.1,
+    ActivityLevel.HIGH: 1.2
+}
+_MODE_K = {
+    ActivityMode.NORMAL: 1.0,
+    ActivityMode.WORKOUT: 1.3,  # +30%
+    ActivityMode.FOCUS: 1.0,
+    ActivityMode.VACATION: 0.8  # -20%
+}
+_MODE_SLUGS = {
+    ActivityMode.NORMAL: "normal",
+    ActivityMode.WORKOUT: "workout",
+    ActivityMode.FOCUS: "focus",
+    ActivityMode.VACATION: "vacation"
+}
+
+
+@dataclass(frozen=True)
 class WaterNormResult:
     """Result of water norm calculation"""
     base_norm: int  # ml
@@ -53,6 +76,26 @@ def calculate_water_norm(
     K_weather: +5% per 5°C above 20°C (max +30%)
     """
     
+    # Weather adjustment (+5% per 5°C above 20°C)
+    weather_bonus = 0
+    if temperature_celsius > 20:
+        degrees_over = temperature_celsius - 20
+        weather_bonus = min(int(degrees_over / 5) * 5, 30)  # Max 30%
+    
+    # Температура влияет на норму только через ступень бонуса (0..30%),
+    # поэтому результат кэшируется по ней, а не по сырым градусам
+    return _calculate_norm_cached(weight, gender, activity_level, weather_bonus, activity_mode)
+
+
+@lru_cache(maxsize=4096)
+def _calculate_norm_cached(
+    weight: float,
+    gender: Gender,
+    activity_level: ActivityLevel,
+    weather_bonus: int,
+    activity_mode: ActivityMode
+) -> WaterNormResult:
+    """Pure norm arithmetic for an already bucketed weather bonus"""
     # Base calculation
     base_ml = weight * 30
     
@@ -61,50 +104,28 @@ def calculate_water_norm(
     base_ml *= gender_k
     
     # Activity coefficient
-    activity_k = {
-        ActivityLevel.LOW: 1.0,
-        ActivityLevel.MEDIUM: 1.1,
-        ActivityLevel.HIGH: 1.2
-    }.get(activity_level, 1.1)
+    activity_k = _ACTIVITY_K.get(activity_level, 1.1)
     base_ml *= activity_k
     
     base_norm = int(base_ml)
     
-    # Weather adjustment (+5% per 5°C above 20°C)
-    weather_bonus = 0
-    if temperature_celsius > 20:
-        degrees_over = temperature_celsius - 20
-        weather_bonus = min(int(degrees_over / 5) * 5, 30)  # Max 30%
-    
     weather_adjusted = int(base_norm * (1 + weather_bonus / 100))
     
     # Activity mode adjustment
-    mode_k = {
-        ActivityMode.NORMAL: 1.0,
-        ActivityMode.WORKOUT: 1.3,  # +30%
-        ActivityMode.FOCUS: 1.0,
-        ActivityMode.VACATION: 0.8  # -20%
-    }.get(activity_mode, 1.0)
+    mode_k = _MODE_K.get(activity_mode, 1.0)
     
     mode_adjusted = int(weather_adjusted * mode_k)
     
     # Clamp to reasonable limits
     final_norm = max(config.MIN_DAILY_WATER_ML, min(mode_adjusted, config.MAX_DAILY_WATER_ML))
     
-    mode_names = {
-        ActivityMode.NORMAL: "normal",
-        ActivityMode.WORKOUT: "workout",
-        ActivityMode.FOCUS: "focus",
-        ActivityMode.VACATION: "vacation"
-    }
-    
     return WaterNormResult(
         base_norm=base_norm,
         weather_adjusted=weather_adjusted,
         mode_adjusted=mode_adjusted,
         final_norm=final_norm,
         weather_bonus_percent=weather_bonus,
-        mode_name=mode_names.get(activity_mode, "normal")
+        mode_name=_MODE_SLUGS.get(activity_mode, "normal")
     )
 
 
@@ -151,6 +172,27 @@ class WeatherService:
         self.base_url = "https://api.openweathermap.org/data/2.5/weather"
         self._cache: Dict[str, Tuple[WeatherData, datetime]] = {}
         self._cache_ttl = timedelta(hours=1)
+        # Города, которые API не нашёл (404): повторный ввод той же строки не идёт в сеть.
+        # Строки вводят пользователи, поэтому кеш ограничен: самые старые промахи вытесняются
+        self._not_found: "OrderedDict[str, datetime]" = OrderedDict()
+        self._not_found_ttl = timedelta(days=1)
+        self._not_found_max = 4096
+        # Запросы к API, которые уже в пути: одновременные промахи по одному городу ждут один ответ
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Одна сессия на весь процесс: пул соединений и keep-alive к API вместо TLS-рукопожатия на каждый запрос
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Lazily create the shared HTTP session (needs a running event loop)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+        return self._session
+    
+    async def close(self) -> None:
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def get_weather(self, city: str) -> Optional[WeatherData]:
         """Get current weather for a city"""
@@ -158,39 +200,59 @@ class WeatherService:
             return None
         
         # Check cache
-        cache_key = city.lower()
+        cache_key = city.strip().lower()
         if cache_key in self._cache:
             data, timestamp = self._cache[cache_key]
             if datetime.utcnow() - timestamp < self._cache_ttl:
                 return data
-        
+        missed_at = self._not_found.get(cache_key)
+        if missed_at is not None:
+            if datetime.utcnow() - missed_at < self._not_found_ttl:
+                return None
+            del self._not_found[cache_key]
+        
+        pending = self._inflight.get(cache_key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch_weather(city, cache_key))
+            self._inflight[cache_key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        # shield: отмена одного ожидающего хендлера не обрывает запрос для остальных
+        return await asyncio.shield(pending)
+    
+    async def _fetch_weather(self, city: str, cache_key: str) -> Optional[WeatherData]:
+        """Request current weather from the API and fill the caches"""
         try:
-            async with aiohttp.ClientSession() as session:
-                params = {
-                    "q": city,
-                    "appid": self.api_key,
-                    "units": "metric",
-                    "lang": "ru"
-                }
-                async with session.get(self.base_url, params=params) as resp:
-                    if resp.status != 200:
-                        return None
-                    
-                    data = await resp.json()
-                    
-                    weather = WeatherData(
-                        temperature=data["main"]["temp"],
-                        feels_like=data["main"]["feels_like"],
-                        humidity=data["main"]["humidity"],
-                        description=data["weather"][0]["description"],
-                        icon=data["weather"][0]["icon"],
-                        city=data["name"]
-                    )
-                    
-                    # Cache result
-                    self._cache[cache_key] = (weather, datetime.utcnow())
-                    return weather
-                    
+            params = {
+                "q": city,
+                "appid": self.api_key,
+                "units": "metric",
+                "lang": "ru"
+            }
+            async with self._get_session().get(self.base_url, params=params) as resp:
+                if resp.status == 404:
+                    self._not_found[cache_key] = datetime.utcnow()
+                    self._not_found.move_to_end(cache_key)
+                    if len(self._not_found) > self._not_found_max:
+                        self._not_found.popitem(last=False)
+                    return None
+                if resp.status != 200:
+                    return None
+                
+                data = await resp.json()
+                
+                weather = WeatherData(
+                    temperature=data["main"]["temp"],
+                    feels_like=data["main"]["feels_like"],
+                    humidity=data["main"]["humidity"],
+                    description=data["weather"][0]["description"],
+                    icon=data["weather"][0]["icon"],
+                    city=data["name"]
+                )
+                
+                # Cache result
+                self._cache[cache_key] = (weather, datetime.utcnow())
+                return weather
+                
         except Exception as e:
             logger.error(f"Weather API error: {e}")
             return None
@@ -596,6 +658,12 @@ achievement_service = AchievementService()
 # INSIGHTS SERVICE
 # ============================================================================
 
+_WEEKDAY_NAMES = (
+    ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"),
+    ("понедельник", "вторник", "среду", "четверг", "пятницу", "субботу", "воскресенье"),
+)
+
+
 class InsightsService:
     """Service for generating user insights"""
     
@@ -636,10 +704,10 @@ class InsightsService:
             evening_logs = 0
             total_logs = 0
             
-            logs = await get_logs_for_period(user_id, date.today() - timedelta(days=7), date.today())
-            for log in logs:
+            points = await get_intake_points(user_id, date.today() - timedelta(days=7), date.today())
+            for _, logged_at, _ in points:
                 total_logs += 1
-                if log.logged_at and log.logged_at.hour >= 18:
+                if logged_at and logged_at.hour >= 18:
                     evening_logs += 1
             
             if total_logs > 0 and evening_logs / total_logs < 0.15:
@@ -652,14 +720,9 @@ class InsightsService:
         best_day = week_stats.get("best_day")
         if best_day and best_day.get("total_ml", 0) > 0:
             date_obj = best_day["date"]
-            day_name = date_obj.strftime("%A")
+            # weekday() — просто индекс, без strftime и зависимости от системной локали
+            day_name = _WEEKDAY_NAMES[lang == "ru"][date_obj.weekday()]
             if lang == "ru":
-                day_names = {
-                    "Monday": "понедельник", "Tuesday": "вторник",
-                    "Wednesday": "среду", "Thursday": "четверг",
-                    "Friday": "пятницу", "Saturday": "субботу", "Sunday": "воскресенье"
-                }
-                day_name = day_names.get(day_name, day_name)
                 insights.append(f"🏆 Лучший результат был в {day_name}: {best_day['total_ml']} мл")
             else:
                 insights.append(f"🏆 Best result was on {day_name}: {best_day['total_ml']} ml")
@@ -673,8 +736,7 @@ class InsightsService:
                 insights.append(f"🔥 Great streak: {streak} days in a row!")
         
         # Save insights
-        for text in insights:
-            await add_insight(user_id, text, "weekly_pattern")
+        await add_insights(user_id, insights, "weekly_pattern")
         
         return insights
 
@@ -796,15 +858,11 @@ def format_main_message(
 
 async def get_user_local_time(user_id: int) -> datetime:
     """Get user's local time based on their timezone"""
-    from zoneinfo import ZoneInfo
-    
-    user = await get_user(user_id)
-    if not user or not user.timezone:
-        return datetime.utcnow()
+    # Нужна только таймзона: кэшируемая выборка одной колонки вместо всей строки users
+    tz_name = await get_user_timezone(user_id)
     
     try:
-        tz = ZoneInfo(user.timezone)
-        return datetime.now(tz)
+        return datetime.now(get_zone(tz_name))
     except:
         return datetime.utcnow()
 
@@ -830,9 +888,9 @@ async def export_user_data(user_id: int, format: str = "json") -> Tuple[str, str
         content = await export_to_csv(user_id)
         filename = f"water_export_{user_id}_{timestamp}.csv"
     else:
-        import json
         data = await export_to_dict(user_id)
-        content = json.dumps(data, indent=2, ensure_ascii=False, default=str)
+        # Годовой экспорт с indent сериализуется чистым Python — уводим из event loop
+        content = await asyncio.to_thread(json.dumps, data, indent=2, ensure_ascii=False, default=str)
         filename = f"water_export_{user_id}_{timestamp}.json"
     
     return content, filename
@@ -62,6 +62,21 @@ MODE_DESCRIPTIONS = {
     }
 }
 
+# Mode icons and localized names (shared by keyboards and settings display)
+MODE_ICONS = {
+    ActivityMode.NORMAL: "🏃",
+    ActivityMode.WORKOUT: "💪",
+    ActivityMode.FOCUS: "🎯",
+    ActivityMode.VACATION: "🏖️",
+}
+
+MODE_NAMES = {
+    ActivityMode.NORMAL: {"ru": "Обычный", "en": "Normal"},
+    ActivityMode.WORKOUT: {"ru": "Тренировка", "en": "Workout"},
+    ActivityMode.FOCUS: {"ru": "Фокус", "en": "Focus"},
+    ActivityMode.VACATION: {"ru": "Отпуск", "en": "Vacation"},
+}
+
 # Mode multipliers
 MODE_MULTIPLIERS = {
     ActivityMode.NORMAL: 1.0,
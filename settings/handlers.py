@@ -3,9 +3,10 @@ Handlers for settings module
 """
 
 import asyncio
+import json
 import logging
+from io import BytesIO
 from datetime import datetime
-from zoneinfo import ZoneInfo
 
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
@@ -13,7 +14,8 @@ from telegram.ext import ContextTypes
 from config import Locale, ActivityMode
 from db import (
     get_user, update_user, delete_future_notifications,
-    reschedule_smart_notifications, export_to_dict, export_to_csv
+    reschedule_smart_notifications, export_to_dict, export_to_csv,
+    delete_all_logs, delete_user
 )
 from settings.keyboards import (
     get_settings_main_keyboard,
@@ -37,8 +39,9 @@ from settings.utils import (
     get_notification_preset,
     get_language_name
 )
+from settings.constants import DANGER_ACTIONS
 from common.decorators import require_registration
-from common.helpers import get_user_locale, safe_send_message
+from common.helpers import get_user_locale, safe_send_message, validate_timezone
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +66,21 @@ async def cb_settings(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+# Шаблон профиля с уже подставленными подписями; в рантайме заполняются только значения
+_PROFILE_TMPL = {
+    lang: (
+        f"👤 **{Locale.get('profile_title', lang)}**\n\n"
+        f"⚖️ {Locale.get('profile_weight', lang)}: {{}} кг\n"
+        f"📏 {Locale.get('profile_height', lang)}: {{}} см\n"
+        "{}\n"
+        "{}\n"
+        f"🏙️ {Locale.get('profile_city', lang)}: {{}}\n"
+        f"⏰ {Locale.get('notifications', lang)}: {{}} - {{}}"
+    )
+    for lang in ("ru", "en")
+}
+
+
 @require_registration
 async def cb_settings_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show profile settings"""
@@ -74,14 +92,10 @@ async def cb_settings_profile(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     settings = await get_user_settings_display(user_id)
     
-    text = (
-        f"👤 **{Locale.get('profile_title', lang)}**\n\n"
-        f"⚖️ {Locale.get('profile_weight', lang)}: {settings['weight']} кг\n"
-        f"📏 {Locale.get('profile_height', lang)}: {settings['height']} см\n"
-        f"{settings['gender_display']}\n"
-        f"{settings['activity_display']}\n"
-        f"🏙️ {Locale.get('profile_city', lang)}: {settings['city']}\n"
-        f"⏰ {Locale.get('notifications', lang)}: {settings['notif_start']} - {settings['notif_end']}"
+    text = _PROFILE_TMPL["ru" if lang == "ru" else "en"].format(
+        settings["weight"], settings["height"],
+        settings["gender_display"], settings["activity_display"],
+        settings["city"], settings["notif_start"], settings["notif_end"],
     )
     
     await query.edit_message_text(
@@ -119,11 +133,12 @@ async def cb_set_timezone(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     lang = get_user_locale(update)
     
-    tz_name = query.data.split("_")[2]  # tz_set_{tz}
+    tz_name = query.data.split("_", 2)[2]  # tz_set_{tz}, в имени могут быть "_"
     
     # Validate timezone
     try:
-        ZoneInfo(tz_name)
+        if not validate_timezone(tz_name):
+            raise ValueError("unknown timezone")
         await update_user(user_id, timezone=tz_name)
         
         # Reschedule notifications with new timezone
@@ -282,11 +297,10 @@ async def cb_export_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
             filename = f"water_export_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         else:
             data = await export_to_dict(user_id)
-            import json
-            content = json.dumps(data, indent=2, ensure_ascii=False, default=str)
+            # json с indent не использует C-энкодер, поэтому сериализуем в отдельном потоке
+            content = await asyncio.to_thread(json.dumps, data, indent=2, ensure_ascii=False, default=str)
             filename = f"water_export_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        from io import BytesIO
         file_bytes = BytesIO(content.encode('utf-8'))
         
         await context.bot.send_document(
@@ -341,7 +355,6 @@ async def cb_danger_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data["danger_action"] = action
     
     # Get confirmation message
-    from settings.constants import DANGER_ACTIONS
     action_info = DANGER_ACTIONS.get(action, {})
     confirm_text = action_info.get(f"confirm_{lang}", "Are you sure?")
     
@@ -369,7 +382,6 @@ async def cb_confirm_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if action == "reset_stats":
         # Reset all water logs but keep user
-        from db import delete_all_logs
         await delete_all_logs(user_id)
         
         await update_user(
@@ -384,7 +396,6 @@ async def cb_confirm_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
     elif action == "delete_account":
         # Delete user and all associated data
-        from db import delete_user
         await delete_user(user_id)
         
         text = "✅ " + ("Аккаунт удален", "Account deleted")[lang == "en"]
@@ -2,16 +2,23 @@
 Keyboard layouts for settings module
 """
 
+from functools import lru_cache
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from typing import List, Optional, Dict
 
 from config import Locale, ActivityMode
 from settings.constants import (
     SETTINGS_CATEGORIES, TIMEZONE_PRESETS, LANGUAGES,
-    NOTIFICATION_PRESETS, DANGER_ACTIONS, MODE_DESCRIPTIONS
+    NOTIFICATION_PRESETS, DANGER_ACTIONS, MODE_DESCRIPTIONS, MODE_ICONS, MODE_NAMES
 )
 
+# callback_data для кнопок режимов, собранные один раз при импорте
+_MODE_SET_CB = {mode: f"mode_set_{mode.value}" for mode in ActivityMode}
+_MODE_INFO_CB = {mode: f"mode_info_{mode.value}" for mode in ActivityMode}
+
 
+@lru_cache(maxsize=4)
 def get_settings_main_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Main settings menu keyboard"""
     keyboard = []
@@ -113,6 +120,7 @@ def get_notifications_settings_keyboard(
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_notification_presets_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for notification presets"""
     keyboard = []
@@ -207,43 +215,48 @@ def get_minute_picker_keyboard(
     return InlineKeyboardMarkup(keyboard)
 
 
+# Кнопки пресетов без отметки и служебные ряды строятся один раз при импорте
+_TZ_BUTTONS = tuple(
+    InlineKeyboardButton(tz_info["name"], callback_data=f"tz_set_{tz_info['tz']}")
+    for tz_info in TIMEZONE_PRESETS
+)
+_TZ_INDEX = {tz_info["tz"]: i for i, tz_info in enumerate(TIMEZONE_PRESETS)}
+_TZ_TAIL_ROWS = {
+    lang: (
+        (InlineKeyboardButton(
+            "📍 " + ("Определить автоматически", "Auto-detect")[lang == "en"],
+            callback_data="tz_auto"
+        ),),
+        (InlineKeyboardButton(Locale.get("btn_back", lang), callback_data="settings"),),
+    )
+    for lang in ("ru", "en")
+}
+
+
 def get_timezone_keyboard(
     current_tz: str = "UTC",
     lang: str = "ru"
 ) -> InlineKeyboardMarkup:
     """Keyboard for timezone selection"""
-    keyboard = []
-    row = []
-    
-    for i, tz_info in enumerate(TIMEZONE_PRESETS):
-        # Mark current timezone
-        marker = " ✓" if tz_info["tz"] == current_tz else ""
-        btn_text = f"{tz_info['name']}{marker}"
-        
-        row.append(InlineKeyboardButton(
-            btn_text,
-            callback_data=f"tz_set_{tz_info['tz']}"
-        ))
-        
-        if len(row) == 2:
-            keyboard.append(row)
-            row = []
-    
-    if row:
-        keyboard.append(row)
-    
-    # Auto-detect button
-    keyboard.append([InlineKeyboardButton(
-        "📍 " + ("Определить автоматически", "Auto-detect")[lang == "en"],
-        callback_data="tz_auto"
-    )])
-    
-    keyboard.append([InlineKeyboardButton(
-        Locale.get("btn_back", lang),
-        callback_data="settings"
-    )])
-    
-    return InlineKeyboardMarkup(keyboard)
+    # Зона вне пресетов даёт ту же клавиатуру без отметки, что и -1
+    return _timezone_keyboard(_TZ_INDEX.get(current_tz, -1), "ru" if lang == "ru" else "en")
+
+
+@lru_cache(maxsize=128)
+def _timezone_keyboard(marked_index: int, lang: str) -> InlineKeyboardMarkup:
+    # Не больше (число пресетов + 1) × 2 языка вариантов — каждый собирается один раз
+    buttons = _TZ_BUTTONS
+    
+    # Mark current timezone: заменяется только одна кнопка
+    if marked_index >= 0:
+        marked = InlineKeyboardButton(
+            f"{TIMEZONE_PRESETS[marked_index]['name']} ✓",
+            callback_data=buttons[marked_index].callback_data
+        )
+        buttons = buttons[:marked_index] + (marked,) + buttons[marked_index + 1:]
+    
+    rows = tuple(buttons[j:j + 2] for j in range(0, len(buttons), 2))
+    return InlineKeyboardMarkup(rows + _TZ_TAIL_ROWS[lang])
 
 
 def get_mode_keyboard(
@@ -264,11 +277,11 @@ def get_mode_keyboard(
         btn_text = f"{mode_icon(mode)} {mode_name(mode, lang)}{marker}"
         keyboard.append([InlineKeyboardButton(
             btn_text,
-            callback_data=f"mode_set_{mode.value}"
+            callback_data=_MODE_SET_CB[mode]
         )])
         keyboard.append([InlineKeyboardButton(
             f"ℹ️ {short_desc}",
-            callback_data=f"mode_info_{mode.value}",
+            callback_data=_MODE_INFO_CB[mode],
             url=None
         )])
     
@@ -304,6 +317,7 @@ def get_language_keyboard(
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_export_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for export options"""
     keyboard = [
@@ -335,6 +349,7 @@ def get_export_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_danger_zone_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for danger zone actions"""
     keyboard = []
@@ -376,21 +391,9 @@ def get_confirmation_keyboard(
 # Helper functions
 def mode_icon(mode: ActivityMode) -> str:
     """Get icon for activity mode"""
-    icons = {
-        ActivityMode.NORMAL: "🏃",
-        ActivityMode.WORKOUT: "💪",
-        ActivityMode.FOCUS: "🎯",
-        ActivityMode.VACATION: "🏖️",
-    }
-    return icons.get(mode, "🎭")
+    return MODE_ICONS.get(mode, "🎭")
 
 
 def mode_name(mode: ActivityMode, lang: str = "ru") -> str:
     """Get localized mode name"""
-    names = {
-        ActivityMode.NORMAL: {"ru": "Обычный", "en": "Normal"},
-        ActivityMode.WORKOUT: {"ru": "Тренировка", "en": "Workout"},
-        ActivityMode.FOCUS: {"ru": "Фокус", "en": "Focus"},
-        ActivityMode.VACATION: {"ru": "Отпуск", "en": "Vacation"},
-    }
-    return names.get(mode, {}).get(lang, str(mode))
\ No newline at end of file
+    return MODE_NAMES.get(mode, {}).get(lang, str(mode))
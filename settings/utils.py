@@ -4,11 +4,24 @@ Utility functions for settings module
 
 from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
-from zoneinfo import ZoneInfo, available_timezones
 
-from config import Gender, ActivityLevel, ActivityMode
+from config import Gender, ActivityLevel, ActivityMode, get_zone
 from db import get_user
-from settings.constants import MODE_MULTIPLIERS, TIMEZONE_PRESETS, LANGUAGES, NOTIFICATION_PRESETS
+from common.helpers import parse_time
+from settings.constants import (
+    MODE_MULTIPLIERS, MODE_ICONS, MODE_NAMES, TIMEZONE_PRESETS, LANGUAGES, NOTIFICATION_PRESETS
+)
+
+# Подписи для отображения настроек, собранные один раз при импорте
+_GENDER_DISPLAY = {
+    Gender.MALE: "👨 Мужской",
+    Gender.FEMALE: "👩 Женский",
+}
+_ACTIVITY_DISPLAY = {
+    ActivityLevel.LOW: "🐢 Низкая",
+    ActivityLevel.MEDIUM: "🚶 Средняя",
+    ActivityLevel.HIGH: "🏃 Высокая",
+}
 
 
 async def get_user_settings_display(user_id: int) -> Dict[str, Any]:
@@ -20,15 +33,10 @@ async def get_user_settings_display(user_id: int) -> Dict[str, Any]:
         return {}
     
     # Format gender
-    gender_display = "👨 Мужской" if user.gender == Gender.MALE else "👩 Женский" if user.gender == Gender.FEMALE else "?"
+    gender_display = _GENDER_DISPLAY.get(user.gender, "?")
     
     # Format activity level
-    activity_map = {
-        ActivityLevel.LOW: "🐢 Низкая",
-        ActivityLevel.MEDIUM: "🚶 Средняя",
-        ActivityLevel.HIGH: "🏃 Высокая",
-    }
-    activity_display = activity_map.get(user.activity_level, "?")
+    activity_display = _ACTIVITY_DISPLAY.get(user.activity_level, "?")
     
     # Format notification times
     start_min = user.notification_start_minutes or 480
@@ -72,7 +80,7 @@ def format_timezone_display(tz_name: str) -> str:
     
     # Try to get offset
     try:
-        tz = ZoneInfo(tz_name)
+        tz = get_zone(tz_name)
         now = datetime.now(tz)
         offset = now.utcoffset()
         if offset:
@@ -87,22 +95,8 @@ def format_timezone_display(tz_name: str) -> str:
 
 def format_mode_display(mode: ActivityMode, lang: str = "ru") -> str:
     """Format activity mode for display"""
-    icons = {
-        ActivityMode.NORMAL: "🏃",
-        ActivityMode.WORKOUT: "💪",
-        ActivityMode.FOCUS: "🎯",
-        ActivityMode.VACATION: "🏖️",
-    }
-    
-    names = {
-        ActivityMode.NORMAL: {"ru": "Обычный", "en": "Normal"},
-        ActivityMode.WORKOUT: {"ru": "Тренировка", "en": "Workout"},
-        ActivityMode.FOCUS: {"ru": "Фокус", "en": "Focus"},
-        ActivityMode.VACATION: {"ru": "Отпуск", "en": "Vacation"},
-    }
-    
-    icon = icons.get(mode, "🎭")
-    name = names.get(mode, {}).get(lang, str(mode))
+    icon = MODE_ICONS.get(mode, "🎭")
+    name = MODE_NAMES.get(mode, {}).get(lang, str(mode))
     
     return f"{icon} {name}"
 
@@ -116,20 +110,11 @@ def validate_time_format(time_str: str) -> Tuple[bool, Optional[int]]:
     """
     Validate time string (HH:MM) and return minutes from midnight
     """
-    try:
-        parts = time_str.split(":")
-        if len(parts) != 2:
-            return False, None
-        
-        hour = int(parts[0])
-        minute = int(parts[1])
-        
-        if 0 <= hour <= 23 and 0 <= minute <= 59:
-            return True, hour * 60 + minute
-    except:
-        pass
-    
-    return False, None
+    # Строгий ЧЧ:ММ: int() по частям пропускал "+5:30", " 7:-0" и т.п.
+    parsed = parse_time(time_str)
+    if parsed is None:
+        return False, None
+    return True, parsed[0] * 60 + parsed[1]
 
 
 def get_timezone_by_offset(offset_hours: float) -> Optional[str]:
@@ -3,6 +3,9 @@ Handlers for statistics module
 """
 
 import asyncio
+import csv
+import io
+import json
 import logging
 from datetime import date, timedelta
 
@@ -15,7 +18,7 @@ from db import (
     get_user, get_achievements_count, get_user_achievements,
     export_to_dict, export_to_csv, get_logs_for_period
 )
-from services import get_user_daily_norm_async, achievement_service, get_progress_bar
+from services import get_user_daily_norm_async, achievement_service, get_progress_bar, export_user_data
 from stats.keyboards import (
     get_stats_keyboard, get_detailed_stats_keyboard,
     get_comparison_keyboard, get_heatmap_keyboard,
@@ -31,6 +34,9 @@ from common.helpers import get_user_locale, safe_send_message, format_number
 
 logger = logging.getLogger(__name__)
 
+# Двухбуквенные дни недели по индексу weekday(); strftime('%a') зависит от локали процесса
+_WEEKDAY_ABBR = ("Mo", "Tu", "We", "Th", "Fr", "Sa", "Su")
+
 
 @require_registration
 async def cb_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -141,7 +147,7 @@ async def format_week_stats(user_id: int, data: dict, goal: int, lang: str) -> s
     # Add daily breakdown
     text += "\n**" + ("По дням:" if lang == "ru" else "Daily:") + "**\n"
     for day_data in week_stats['days'][:7]:
-        day_name = day_data['date'].strftime('%a')[0:2]
+        day_name = _WEEKDAY_ABBR[day_data['date'].weekday()]
         bar = get_progress_bar(day_data['total_ml'], goal, 5)
         text += f"{day_name}: {bar} {day_data['total_ml']} мл\n"
     
@@ -287,7 +293,6 @@ async def cb_export_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Get period for export
     if period == "all":
-        from services import export_user_data
         content, filename = await export_user_data(user_id, format_type)
     else:
         # For specific period, we need to filter
@@ -305,13 +310,11 @@ async def cb_export_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
         else:
             # Generate JSON for period
             data = await get_period_export(user_id, period_data)
-            import json
-            content = json.dumps(data, indent=2, ensure_ascii=False, default=str)
+            content = await asyncio.to_thread(json.dumps, data, indent=2, ensure_ascii=False, default=str)
             filename = f"water_export_{period}_{user_id}_{date.today().isoformat()}.json"
     
     # Send file
-    from io import BytesIO
-    file_bytes = BytesIO(content.encode('utf-8'))
+    file_bytes = io.BytesIO(content.encode('utf-8'))
     
     await context.bot.send_document(
         chat_id=user_id,
@@ -328,9 +331,6 @@ async def cb_export_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 def export_logs_to_csv(logs) -> str:
     """Convert logs to CSV string"""
-    import io
-    import csv
-    
     output = io.StringIO()
     writer = csv.writer(output)
     
@@ -2,6 +2,8 @@
 Keyboard layouts for statistics module
 """
 
+from functools import lru_cache
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from datetime import date, timedelta
 
@@ -9,6 +11,7 @@ from config import Locale
 from stats.constants import PERIODS
 
 
+@lru_cache(maxsize=4)
 def get_stats_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Main statistics keyboard"""
     keyboard = []
@@ -90,6 +93,7 @@ def get_detailed_stats_keyboard(
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_comparison_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for comparing periods"""
     keyboard = [
@@ -106,6 +110,7 @@ def get_comparison_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_heatmap_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for heatmap visualization options"""
     keyboard = [
@@ -122,6 +127,7 @@ def get_heatmap_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_export_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for export options"""
     keyboard = [
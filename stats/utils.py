@@ -8,7 +8,7 @@ from collections import defaultdict
 import calendar
 
 from db import (
-    get_logs_for_period, get_date_total, get_user,
+    get_intake_points, get_daily_totals, get_date_total, get_user,
     get_user_stats as get_stats
 )
 from stats.constants import (
@@ -23,17 +23,8 @@ async def get_user_lang(user_id: int) -> str:
     return user.language if user else "ru"
 
 
-async def get_period_data(
-    user_id: int,
-    period: str,
-    target_date: Optional[date] = None
-) -> Dict[str, Any]:
-    """
-    Get statistics for a specific period
-    """
-    if target_date is None:
-        target_date = date.today()
-    
+def _period_range(period: str, target_date: date) -> Tuple[Dict[str, Any], Optional[int], date, date]:
+    """Resolve period name to (period_info, days, start_date, end_date)"""
     period_info = PERIODS.get(period, PERIODS["week"])
     days = period_info.get("days")
     
@@ -43,13 +34,19 @@ async def get_period_data(
     else:
         end_date = target_date
         start_date = target_date - timedelta(days=days - 1)
-    
-    logs = await get_logs_for_period(user_id, start_date, end_date)
-    
-    daily_totals = defaultdict(int)
-    for log in logs:
-        daily_totals[log.logged_date] += log.effective_ml
-    
+    return period_info, days, start_date, end_date
+
+
+def _summarise_period(
+    period: str,
+    period_info: Dict[str, Any],
+    days: Optional[int],
+    start_date: date,
+    end_date: date,
+    daily_totals: Dict[date, int],
+    lang: str
+) -> Dict[str, Any]:
+    """Build period statistics from already fetched daily totals"""
     total_ml = sum(daily_totals.values())
     active_days = len(daily_totals)
     avg_per_day = total_ml / days if days and days > 0 else total_ml / max(active_days, 1)
@@ -61,8 +58,6 @@ async def get_period_data(
             best_value = v
             best_day = d
     
-    lang = await get_user_lang(user_id)
-    
     return {
         "period": period,
         # ИСПРАВЛЕНО: используем period_info[lang] вместо period_info[f"name_{lang}"]
@@ -79,6 +74,24 @@ async def get_period_data(
     }
 
 
+async def get_period_data(
+    user_id: int,
+    period: str,
+    target_date: Optional[date] = None
+) -> Dict[str, Any]:
+    """
+    Get statistics for a specific period
+    """
+    if target_date is None:
+        target_date = date.today()
+    
+    period_info, days, start_date, end_date = _period_range(period, target_date)
+    daily_totals = await get_daily_totals(user_id, start_date, end_date)
+    lang = await get_user_lang(user_id)
+    
+    return _summarise_period(period, period_info, days, start_date, end_date, daily_totals, lang)
+
+
 def format_heatmap(daily_data: Dict[date, int], goal: int, width: int = 7) -> str:
     """
     Format data as a heatmap (calendar view)
@@ -190,7 +203,7 @@ async def get_time_distribution(user_id: int, days: int = 30) -> Dict[str, int]:
     end_date = date.today()
     start_date = end_date - timedelta(days=days)
     
-    logs = await get_logs_for_period(user_id, start_date, end_date)
+    points = await get_intake_points(user_id, start_date, end_date)
     
     distribution = {
         "morning": 0,    # 6-12
@@ -199,18 +212,18 @@ async def get_time_distribution(user_id: int, days: int = 30) -> Dict[str, int]:
         "night": 0,      # 0-6
     }
     
-    for log in logs:
-        if log.logged_at:
-            hour = log.logged_at.hour
+    for _, logged_at, effective_ml in points:
+        if logged_at:
+            hour = logged_at.hour
             
             if 6 <= hour < 12:
-                distribution["morning"] += log.effective_ml
+                distribution["morning"] += effective_ml
             elif 12 <= hour < 18:
-                distribution["afternoon"] += log.effective_ml
+                distribution["afternoon"] += effective_ml
             elif 18 <= hour < 24:
-                distribution["evening"] += log.effective_ml
+                distribution["evening"] += effective_ml
             else:
-                distribution["night"] += log.effective_ml
+                distribution["night"] += effective_ml
     
     return distribution
 
@@ -246,14 +259,14 @@ async def get_weekday_distribution(user_id: int, weeks: int = 8) -> Dict[int, in
     end_date = date.today()
     start_date = end_date - timedelta(weeks=weeks)
     
-    logs = await get_logs_for_period(user_id, start_date, end_date)
+    points = await get_intake_points(user_id, start_date, end_date)
     
     distribution = defaultdict(int)
     counts = defaultdict(int)
     
-    for log in logs:
-        weekday = log.logged_date.weekday()
-        distribution[weekday] += log.effective_ml
+    for logged_date, _, effective_ml in points:
+        weekday = logged_date.weekday()
+        distribution[weekday] += effective_ml
         counts[weekday] += 1
     
     # Calculate averages
@@ -297,8 +310,22 @@ async def compare_periods(
     """
     Compare two periods
     """
-    data1 = await get_period_data(user_id, period1)
-    data2 = await get_period_data(user_id, period2)
+    today = date.today()
+    info1, days1, start1, end1 = _period_range(period1, today)
+    info2, days2, start2, end2 = _period_range(period2, today)
+    
+    # Один GROUP BY по объединённому диапазону вместо отдельного запроса на каждый период
+    totals = await get_daily_totals(user_id, min(start1, start2), max(end1, end2))
+    lang = await get_user_lang(user_id)
+    
+    data1 = _summarise_period(
+        period1, info1, days1, start1, end1,
+        {d: v for d, v in totals.items() if start1 <= d <= end1}, lang
+    )
+    data2 = _summarise_period(
+        period2, info2, days2, start2, end2,
+        {d: v for d, v in totals.items() if start2 <= d <= end2}, lang
+    )
     
     total_change = data2["total_ml"] - data1["total_ml"]
     percent_change = (total_change / data1["total_ml"] * 100) if data1["total_ml"] > 0 else 0
@@ -11,13 +11,14 @@ from telegram.ext import ContextTypes
 
 from config import Locale, DrinkType
 from db import (
-    add_water_log, get_today_total, get_user,
+    add_water_log, add_water_log_with_total, get_today_total, get_user, get_user_timezone,
     update_streak, reschedule_smart_notifications,
     get_favorite_volumes, add_favorite_volume
 )
 from services import (
     get_user_daily_norm_async,  # ИСПРАВЛЕНО: используем асинхронную версию
     achievement_service,
+    get_progress_bar,
 )
 from water.keyboards import (
     get_water_keyboard,
@@ -52,20 +53,6 @@ async def format_main_message(current_ml, goal_ml, streak, temperature, weather_
     return text
 
 
-def get_progress_bar(current, goal, width=10):
-    """Generate progress bar"""
-    if goal <= 0:
-        return "░" * width
-    
-    percent = min(current / goal, 1.0)
-    filled = int(percent * width)
-    
-    if percent >= 1.0:
-        return "█" * width
-    else:
-        return "█" * filled + "░" * (width - filled)
-
-
 @require_registration
 async def cb_add_water(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show water volume selection"""
@@ -164,12 +151,10 @@ async def cb_drink_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Clear pending data
         context.user_data.pop("pending_volume", None)
         
-        # Get user for timezone
-        user = await get_user(user_id)
-        timezone = user.timezone if user else "UTC"
+        timezone = await get_user_timezone(user_id)
         
-        # Add water log
-        log = await add_water_log(
+        # Add water log (сумма за день приходит из той же транзакции)
+        log, today_total = await add_water_log_with_total(
             user_id=user_id,
             volume_ml=volume,
             drink_type=drink_type,
@@ -185,7 +170,7 @@ async def cb_drink_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         
         # Check if daily goal reached
-        goal_reached, today_total, goal = await check_daily_goal_completion(user_id)
+        goal_reached, today_total, goal = await check_daily_goal_completion(user_id, today_total)
         if goal_reached:
             await update_streak(user_id, True)
         
@@ -259,7 +244,8 @@ async def cb_drink_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def handle_custom_volume(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle custom volume input"""
-    if not context.user_data.get("waiting_custom_volume"):
+    user_data = context.user_data
+    if not user_data.get("waiting_custom_volume"):
         return
     
     lang = get_user_locale(update)
@@ -273,8 +259,8 @@ async def handle_custom_volume(update: Update, context: ContextTypes.DEFAULT_TYP
         return
     
     # Store volume and clear waiting flag
-    context.user_data["pending_volume"] = volume
-    context.user_data["waiting_custom_volume"] = False
+    user_data["pending_volume"] = volume
+    user_data["waiting_custom_volume"] = False
     
     # Show drink categories
     await update.message.reply_text(
@@ -326,9 +312,7 @@ async def cb_quick_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
     drink_type_str = data[2]
     drink_type = DrinkType(drink_type_str)
     
-    # Get user for timezone
-    user = await get_user(user_id)
-    timezone = user.timezone if user else "UTC"
+    timezone = await get_user_timezone(user_id)
     
     # Add water log
     log = await add_water_log(
@@ -2,13 +2,19 @@
 Keyboard layouts for water tracking
 """
 
+from functools import lru_cache
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from typing import List, Optional
 
 from config import Locale, DrinkType
 from water.constants import WATER_PRESETS, DRINK_CATEGORIES, DRINK_NAMES
 
+# callback_data для кнопок напитков, собранные один раз при импорте
+_DRINK_CB = {drink: f"drink_{drink.value}" for drink in DrinkType}
+
 
+@lru_cache(maxsize=4)
 def get_water_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for water volume selection"""
     keyboard = []
@@ -34,6 +40,7 @@ def get_water_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_drink_category_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for drink category selection"""
     keyboard = []
@@ -49,6 +56,7 @@ def get_drink_category_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=32)
 def get_drink_type_keyboard(lang: str = "ru", category: str = "water") -> InlineKeyboardMarkup:
     """Keyboard for specific drink selection within category"""
     keyboard = []
@@ -58,7 +66,7 @@ def get_drink_type_keyboard(lang: str = "ru", category: str = "water") -> Inline
     
     for i, drink in enumerate(category_drinks):
         drink_name = DRINK_NAMES.get(drink, {}).get(lang, str(drink))
-        callback = f"drink_{drink.value}"
+        callback = _DRINK_CB[drink]
         
         row.append(InlineKeyboardButton(drink_name, callback_data=callback))
         
@@ -112,6 +120,7 @@ def get_quick_add_keyboard(
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_notification_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for notification messages with quick add"""
     keyboard = [
@@ -120,6 +129,7 @@ def get_notification_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=4)
 def get_favorite_management_keyboard(lang: str = "ru") -> InlineKeyboardMarkup:
     """Keyboard for managing favorite volumes"""
     keyboard = [
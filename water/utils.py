@@ -65,13 +65,17 @@ def format_success_message(
         )
 
 
-async def check_daily_goal_completion(user_id: int) -> Tuple[bool, int, int]:
+async def check_daily_goal_completion(
+    user_id: int,
+    today_total: Optional[int] = None
+) -> Tuple[bool, int, int]:
     """Check if daily goal is completed and return progress"""
     user = await get_user(user_id)
     if not user:
         return False, 0, 0
     
-    today_total = await get_today_total(user_id)
+    if today_total is None:
+        today_total = await get_today_total(user_id)
     # ИСПРАВЛЕНО: добавляем await
     goal = await get_user_daily_norm_async(user_id)
     
@@ -137,13 +141,15 @@ def get_time_based_greeting(lang: str = "ru") -> str:
 
 def validate_custom_volume(volume_str: str) -> Tuple[bool, Optional[int], Optional[str]]:
     """Validate custom volume input"""
-    try:
-        volume = int(volume_str)
-        if 1 <= volume <= 5000:
-            return True, volume, None
-        elif volume <= 0:
-            return False, None, "error_volume_too_small"
-        else:
-            return False, None, "error_volume_too_large"
-    except ValueError:
-        return False, None, "error_invalid_number"
\ No newline at end of file
+    text = volume_str.strip()
+    # Проверяем цифры заранее: мусорный ввод не должен идти через raise/except
+    digits = text[1:] if text.startswith(("-", "+")) else text
+    if not (digits.isascii() and digits.isdigit()):
+        return False, None, "error_invalid_number"
+    volume = int(text)
+    if 1 <= volume <= 5000:
+        return True, volume, None
+    elif volume <= 0:
+        return False, None, "error_volume_too_small"
+    else:
+        return False, None, "error_volume_too_large"
\ No newline at end of file